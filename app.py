@@ -13,6 +13,12 @@ from routes.math_route import math_game_blueprint
 from database.db import init_db
 from database import db
 from services.auth_service import clear_session_files
+from services.vocab_service import init_sheet_sync
+from services.vocab_sync_service import start_vocabulary_sync
+from services.enrichment_service import start_enrichment_worker
+from services.math_bank_service import start_math_bank_refiller
+from services.llm_backend import configure_backend
+from commands import register_commands
 
 # Set up Debug logging if its local environment else INFO logging for Heroku
 import os
@@ -37,6 +43,16 @@ Session(app)
 init_db(app)
 # Initialize Flask-Migrate
 migrate = Migrate(app, db)
+# Track what the Google Sheets write-behind buffer has synced
+init_sheet_sync(app)
+register_commands(app)
+configure_backend(Config.LLM_BACKEND, Config.FAKE_LLM_LATENCY_SECONDS, Config.FAKE_LLM_ERROR_RATE, Config.FAKE_LLM_RATE_LIMIT_RATE)
+if Config.VOCAB_SYNC_INTERVAL_SECONDS > 0:
+    start_vocabulary_sync(app, Config.VOCAB_SYNC_INTERVAL_SECONDS)
+if Config.ENRICHMENT_INTERVAL_SECONDS > 0 and (Config.OPENAI_API_KEY or Config.LLM_BACKEND == 'fake'):
+    start_enrichment_worker(app, Config.ENRICHMENT_INTERVAL_SECONDS, Config.ENRICHMENT_MAX_WORKERS, Config.ENRICHMENT_BATCH_SIZE)
+if Config.MATH_BANK_REFILL_INTERVAL_SECONDS > 0:
+    start_math_bank_refiller(app, Config.MATH_BANK_REFILL_INTERVAL_SECONDS, Config.MATH_BANK_TARGET_DEPTH, Config.MATH_BANK_REFILL_BATCH_SIZE)
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -0,0 +1,66 @@
+# Flask CLI commands, registered on the app in app.py
+import click
+from flask.cli import with_appcontext
+import logging
+logger = logging.getLogger(__name__)
+
+
+@click.command('sync-vocab')
+@click.option('--batch-size', default=500, show_default=True, help='Rows written per database commit and Sheets call.')
+@with_appcontext
+def sync_vocab_command(batch_size):
+    """Reconcile the Vocabulary worksheet with the local vocabulary table."""
+    from services.vocab_sync_service import sync_vocabulary
+    stats = sync_vocabulary(batch_size=batch_size)
+    click.echo(
+        f"Sheet words: {stats['sheet_words']}, pulled: {stats['pulled']}, "
+        f"definitions filled: {stats['updated']}, pushed to sheet: {stats['pushed']}"
+    )
+
+
+@click.command('enrich-words')
+@click.option('--file', 'words_file', type=click.Path(exists=True, dir_okay=False), help='Text file with one word per line. Defaults to the Vocabulary sheet.')
+@click.option('--concurrency', default=4, show_default=True, help='Generations in flight at once.')
+@click.option('--rpm', default=500, show_default=True, help='OpenAI requests per minute budget.')
+@click.option('--tpm', default=200000, show_default=True, help='OpenAI tokens per minute budget.')
+@click.option('--batch-size', default=50, show_default=True, help='Words inserted per database commit.')
+@click.option('--checkpoint', default='.enrich-checkpoint', show_default=True, help='File recording finished words so a rerun resumes.')
+@with_appcontext
+def enrich_words_command(words_file, concurrency, rpm, tpm, batch_size, checkpoint):
+    """Generate definitions and incorrect options for many words at once."""
+    from services.enrichment_service import bulk_enrich
+    if words_file:
+        with open(words_file, encoding='utf-8') as source:
+            words = [line.strip() for line in source if line.strip()]
+    else:
+        from services.google_sheet_service import GoogleSheetsService
+        words = [word for word, _ in GoogleSheetsService.from_config().load_vocabulary_rows()]
+
+    def report(done, failed, total, elapsed):
+        rate = done / elapsed if elapsed else 0.0
+        eta = (total - done - failed) / rate if rate else float('inf')
+        click.echo(f"{done}/{total} enriched, {failed} failed, {rate * 60:.1f} words/min, ETA {eta:.0f}s")
+
+    stats = bulk_enrich(words, concurrency=concurrency, rpm=rpm, tpm=tpm,
+                        checkpoint_path=checkpoint, batch_size=batch_size, progress=report)
+    click.echo(f"Enriched {stats['enriched']} of {stats['total']} words in {stats['elapsed_seconds']:.1f}s")
+
+
+@click.command('fill-explanations')
+@click.option('--limit', default=None, type=int, help='Most problems to explain in this run. Defaults to all.')
+@with_appcontext
+def fill_explanations_command(limit):
+    """Generate explanations for banked math problems that have none and save them to the sheet."""
+    from services.math_bank_service import fill_missing_explanations
+
+    def report(done, failed, total):
+        click.echo(f"{done}/{total} explained, {failed} failed")
+
+    stats = fill_missing_explanations(limit=limit, progress=report)
+    click.echo(f"Explained {stats['generated']} of {stats['total']} problems, {stats['pushed']} saved to Google Sheets")
+
+
+def register_commands(app):
+    app.cli.add_command(sync_vocab_command)
+    app.cli.add_command(enrich_words_command)
+    app.cli.add_command(fill_explanations_command)
@@ -16,10 +16,10 @@ else:
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your_secret_key_here'
     SESSION_TYPE = 'filesystem'
-    SESSION_FILE_DIR = './flask_session/'
+    SESSION_FILE_DIR = os.environ.get('SESSION_FILE_DIR', './flask_session/')
     SESSION_PERMANENT = False
     SESSION_USE_SIGNER = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///vocab_game.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///vocab_game.db')
     # if its heroku environment then use jawsdb
     if os.environ.get('HEROKU') == 'True':
         logger.debug(f"Using JAWSDB")
@@ -27,5 +27,55 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     # OpenAI API key
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+    # Shared limits for every OpenAI call made by this process
+    OPENAI_REQUESTS_PER_SECOND = float(os.environ.get('OPENAI_REQUESTS_PER_SECOND', 5))
+    OPENAI_BURST = int(os.environ.get('OPENAI_BURST', 10))
+    OPENAI_LIMITER_TIMEOUT_SECONDS = float(os.environ.get('OPENAI_LIMITER_TIMEOUT_SECONDS', 10))
+    OPENAI_REQUEST_TIMEOUT_SECONDS = float(os.environ.get('OPENAI_REQUEST_TIMEOUT_SECONDS', 30))
+    OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', 3))
+    OPENAI_BREAKER_THRESHOLD = int(os.environ.get('OPENAI_BREAKER_THRESHOLD', 5))
+    OPENAI_BREAKER_RESET_SECONDS = float(os.environ.get('OPENAI_BREAKER_RESET_SECONDS', 30))
     GOOGLE_CREDENTIALS_JSON = os.environ.get('GOOGLE_CREDENTIALS_JSON')
     SPREADSHEET_ID = os.environ.get('SPREADSHEET_ID')
+    # How long the shared word list is served from memory before a background refresh
+    WORD_CACHE_TTL_SECONDS = int(os.environ.get('WORD_CACHE_TTL_SECONDS', 300))
+    # How long a worksheet row index is trusted before it is rebuilt (rows appended by other workers)
+    SHEET_INDEX_TTL_SECONDS = int(os.environ.get('SHEET_INDEX_TTL_SECONDS', 600))
+    # Minimum time between delta fetches of new rows from the MathProblems worksheet
+    MATH_SYNC_INTERVAL_SECONDS = int(os.environ.get('MATH_SYNC_INTERVAL_SECONDS', 60))
+    # Run the Sheets <-> database vocabulary sync in-process on this interval; 0 disables it
+    VOCAB_SYNC_INTERVAL_SECONDS = int(os.environ.get('VOCAB_SYNC_INTERVAL_SECONDS', 0))
+    # Similar-words results are reused for this long; failed lookups are retried after the failure TTL
+    SIMILAR_WORDS_TTL_DAYS = int(os.environ.get('SIMILAR_WORDS_TTL_DAYS', 30))
+    SIMILAR_WORDS_FAILURE_TTL_SECONDS = int(os.environ.get('SIMILAR_WORDS_FAILURE_TTL_SECONDS', 300))
+    SIMILAR_WORDS_LRU_SIZE = int(os.environ.get('SIMILAR_WORDS_LRU_SIZE', 2048))
+    # Background generation of definitions for words missing from word_data; 0 disables it
+    ENRICHMENT_INTERVAL_SECONDS = int(os.environ.get('ENRICHMENT_INTERVAL_SECONDS', 60))
+    ENRICHMENT_MAX_WORKERS = int(os.environ.get('ENRICHMENT_MAX_WORKERS', 2))
+    ENRICHMENT_BATCH_SIZE = int(os.environ.get('ENRICHMENT_BATCH_SIZE', 10))
+    # Background refill of the math problem bank: every (category, topic, difficulty) bucket is kept at
+    # MATH_BANK_TARGET_DEPTH problems, generating at most MATH_BANK_REFILL_BATCH_SIZE per pass (0 disables)
+    MATH_BANK_REFILL_INTERVAL_SECONDS = int(os.environ.get('MATH_BANK_REFILL_INTERVAL_SECONDS', 60))
+    MATH_BANK_TARGET_DEPTH = int(os.environ.get('MATH_BANK_TARGET_DEPTH', 3))
+    MATH_BANK_REFILL_BATCH_SIZE = int(os.environ.get('MATH_BANK_REFILL_BATCH_SIZE', 10))
+    # Concurrent generation of the same word or math bucket is coalesced: other workers wait up to
+    # GENERATION_WAIT_SECONDS for the lease holder, whose lease expires after GENERATION_LEASE_SECONDS
+    GENERATION_LEASE_SECONDS = int(os.environ.get('GENERATION_LEASE_SECONDS', 60))
+    GENERATION_WAIT_SECONDS = float(os.environ.get('GENERATION_WAIT_SECONDS', 30))
+    # 'openai' calls the API; 'fake' answers every prompt locally and deterministically, with optional injected
+    # latency and error / rate-limit probabilities, for offline development and load testing
+    LLM_BACKEND = os.environ.get('LLM_BACKEND', 'openai')
+    FAKE_LLM_LATENCY_SECONDS = float(os.environ.get('FAKE_LLM_LATENCY_SECONDS', 0.5))
+    FAKE_LLM_ERROR_RATE = float(os.environ.get('FAKE_LLM_ERROR_RATE', 0))
+    FAKE_LLM_RATE_LIMIT_RATE = float(os.environ.get('FAKE_LLM_RATE_LIMIT_RATE', 0))
+    # Per-process LRU of parsed question records (word, definition, distractors); rows changed by this
+    # process are evicted immediately, changes made by other workers show up within the TTL
+    QUESTION_RECORD_CACHE_SIZE = int(os.environ.get('QUESTION_RECORD_CACHE_SIZE', 4096))
+    QUESTION_RECORD_CACHE_TTL_SECONDS = int(os.environ.get('QUESTION_RECORD_CACHE_TTL_SECONDS', 300))
+    # Vocabulary answers a user can submit per day before being sent to the dashboard
+    DAILY_VOCAB_ATTEMPT_LIMIT = int(os.environ.get('DAILY_VOCAB_ATTEMPT_LIMIT', 120))
+    # Bearer token a Prometheus scraper sends to /metrics/prometheus; the endpoint is disabled while unset
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    # Pending vocabulary writes are flushed to Google Sheets on this interval or once this many are queued
+    SHEETS_FLUSH_INTERVAL_SECONDS = float(os.environ.get('SHEETS_FLUSH_INTERVAL_SECONDS', 5))
+    SHEETS_FLUSH_BATCH_SIZE = int(os.environ.get('SHEETS_FLUSH_BATCH_SIZE', 50))
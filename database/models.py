@@ -2,7 +2,9 @@
 from sqlalchemy import func
 from .db import db
 from flask_login import UserMixin, current_user
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import random
+import threading
 import logging
 logger = logging.getLogger(__name__)
 
@@ -34,6 +36,9 @@ class WordCount(db.Model):
 
     __table_args__ = (
         db.PrimaryKeyConstraint('word', 'updated_by'),
+        # The daily-limit check filters on user and time, the dashboard queries on a time range
+        db.Index('ix_word_counts_updated_by_updated_at', 'updated_by', 'updated_at'),
+        db.Index('ix_word_counts_updated_at', 'updated_at'),
     )
 
     @classmethod
@@ -62,29 +67,14 @@ class WordCount(db.Model):
     
     @classmethod
     def increment_word_count(cls, word):
-        # Check this word exist for the logged in user in the table by querying column word and updated_by
-
-        word_count_row = cls.query.filter_by(word=word).filter_by(updated_by=current_user.username).first()
-        if word_count_row:
-            word_count_row.count += 1
-            word_count_row.updated_at = db.func.now()
-        else:
-            word_count_row = cls(word=word, count=1, updated_by=current_user.username, updated_at=db.func.now())
-            db.session.add(word_count_row)
+        # Add one correct answer for the logged in user, creating the row on the first answer
+        cls._increment(word, 'count')
         db.session.commit()
         
     @classmethod
     def increment_incorrect_count(cls, word):
         logger.info(f'Current user is: {current_user.username} word is: {word}' )
-        word_incorrect_count = cls.query.filter_by(word=word, updated_by=current_user.username).first()
-        if word_incorrect_count:
-            # Safely increment the count if the row exists
-            word_incorrect_count.incorrect_count += 1
-            word_incorrect_count.updated_at = db.func.now()
-        else:
-            # Create a new row if it does not exist
-            word_incorrect_count = cls(word=word, incorrect_count=1, updated_by=current_user.username, updated_at=db.func.now())
-            db.session.add(word_incorrect_count)
+        cls._increment(word, 'incorrect_count')
         
         # Commit the changes
         try:
@@ -92,6 +82,22 @@ class WordCount(db.Model):
         except Exception as e:
             db.session.rollback()
             logger.error(f"Failed to update incorrect count: {e}") 
+
+    @classmethod
+    def _increment(cls, word, column):
+        """
+        Adds one to column for (word, current user) and one to the user's attempts for today, in the
+        caller's transaction. Both are single upserts, so concurrent answers neither lose increments
+        nor collide on the primary key.
+        """
+        username = current_user.username
+        _upsert_increment(
+            cls,
+            {'word': word, 'updated_by': username, 'count': 0, 'incorrect_count': 0, column: 1, 'updated_at': func.now()},
+            {column: getattr(cls, column) + 1, 'updated_at': func.now()},
+            ['word', 'updated_by'],
+        )
+        DailyAttempts.record_attempt(username)
     
     @classmethod
     def get_learnt_words(cls):
@@ -148,7 +154,60 @@ class WordCount(db.Model):
         daily_incorrect_count_by_user = {(row.date, row.updated_by): row.total_incorrect_count for row in daily_incorrect_count_by_user}
         return daily_incorrect_count_by_user
 
+def _upsert_statement(model, values, increment, index_elements, dialect):
+    """
+    A single INSERT ... ON DUPLICATE KEY UPDATE (MySQL, which the deployment runs on) or
+    INSERT ... ON CONFLICT DO UPDATE (SQLite, used locally and in tests), or None for other databases.
+    """
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        return insert(model).values(**values).on_duplicate_key_update(**increment)
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(model).values(**values).on_conflict_do_update(index_elements=index_elements, set_=increment)
+    return None
+
+
+def _upsert_increment(model, values, increment, index_elements):
+    """Inserts values, or applies increment to the existing row; databases without an upsert use a read-then-write."""
+    statement = _upsert_statement(model, values, increment, index_elements, db.engine.dialect.name)
+    if statement is not None:
+        db.session.execute(statement)
+        return
+    row = db.session.get(model, {key: values[key] for key in index_elements})
+    if row:
+        for key, value in increment.items():
+            setattr(row, key, value)
+    else:
+        db.session.add(model(**values))
+
+
+class DailyAttempts(db.Model):
+    """Answers submitted per user per day, so the daily-limit check is a primary-key read."""
+    __tablename__ = 'daily_attempts'
+    username = db.Column(db.String(150), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    @classmethod
+    def record_attempt(cls, username):
+        """Adds one attempt for today; the caller commits it together with the answer."""
+        _upsert_increment(
+            cls,
+            {'username': username, 'day': date.today(), 'attempts': 1, 'updated_at': func.now()},
+            {'attempts': cls.attempts + 1, 'updated_at': func.now()},
+            ['username', 'day'],
+        )
+
+    @classmethod
+    def get_today(cls, username) -> int:
+        row = db.session.get(cls, {'username': username, 'day': date.today()})
+        return row.attempts if row else 0
+
+
 from sqlalchemy.dialects.postgresql import JSON
+import hashlib
 
 class WordData(db.Model):
     __tablename__ = 'word_data'
@@ -181,31 +240,327 @@ class WordData(db.Model):
         return word_data.incorrect_options if word_data else None
     
     @classmethod
-    def get_unlearned_words(cls, all_words, max_count=1):
-        # 1) Query for WordCount rows
-        word_count_rows = (
-            db.session.query(WordCount.word, WordCount.count)
-            .filter(
-                WordCount.word.in_(all_words),
-                WordCount.updated_by == current_user.username
-            )
+    def get_enriched_words(cls, words) -> list:
+        """The subset of words that already have a word_data row, in their original order."""
+        enriched = {row.word for row in db.session.query(cls.word).filter(cls.word.in_([word.strip() for word in words])).all()}
+        return [word for word in words if word.strip() in enriched]
+
+
+class SheetSyncState(db.Model):
+    """Hash of the word and definition last written to the Vocabulary worksheet, per word."""
+    __tablename__ = 'sheet_sync_state'
+    word = db.Column(db.String(150), primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False)
+    synced_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    @staticmethod
+    def normalize_word(word):
+        return str(word).strip().lower()
+
+    @staticmethod
+    def content_hash_for(word, definition):
+        content = f"{str(word).strip().lower()}\x1f{str(definition).strip()}"
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def is_synced(cls, word, definition) -> bool:
+        """True when this exact word and definition were already written to Google Sheets."""
+        state = db.session.get(cls, cls.normalize_word(word))
+        return state is not None and state.content_hash == cls.content_hash_for(word, definition)
+
+    @classmethod
+    def mark_synced(cls, entries, commit=True):
+        """
+        Record the content hash of each flushed (word, definition, timestamp) entry.
+        With commit=False the hashes are only added to the session, for the caller to commit.
+        """
+        for word, definition, _ in entries:
+            db.session.merge(cls(word=cls.normalize_word(word), content_hash=cls.content_hash_for(word, definition)))
+        if not commit:
+            return
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to record synced vocabulary hashes: {e}")
+
+
+class Vocabulary(db.Model):
+    """Local copy of the Vocabulary worksheet; the quiz reads its word list from here."""
+    __tablename__ = 'vocabulary'
+    word = db.Column(db.String(150), primary_key=True)
+    definition = db.Column(db.Text, nullable=True)
+    # Set when the row has changes that still have to be written to Google Sheets
+    needs_push = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+    # Uniform random position in [0, 1), indexed so a random sample is a short range scan
+    sample_key = db.Column(db.Float, nullable=False, default=random.random, index=True)
+
+    @classmethod
+    def get_words(cls) -> list:
+        return [row.word for row in db.session.query(cls.word).order_by(cls.created_at, cls.word).all()]
+
+    # Set once this process has made sure every sheet word is in the table
+    _seeded = False
+    _seed_lock = threading.Lock()
+
+    @classmethod
+    def ensure_seeded(cls, load_words) -> bool:
+        """
+        Adds the words from load_words() (the sheet word list) that are missing from the table, once per
+        process, so the quiz samples the whole vocabulary even before `flask sync-vocab` has run.
+        Words stored while serving questions don't count: the table may be non-empty and still unsynced.
+        Returns whether the table has been seeded; if load_words() raises, nothing is seeded and the
+        next call tries again.
+        """
+        if cls._seeded:
+            return True
+        with cls._seed_lock:
+            if cls._seeded:
+                return True
+            try:
+                words = load_words()
+            except Exception as e:
+                # Never seed from a fallback list
+                logger.warning(f"Not seeding the vocabulary table, the sheet word list is unavailable: {e}")
+                return False
+            existing = {row.word.lower() for row in db.session.query(cls.word).all()}
+            new_rows = []
+            for word in words:
+                word = str(word).strip()
+                if word and word.lower() not in existing:
+                    existing.add(word.lower())
+                    new_rows.append(cls(word=word))
+            try:
+                db.session.add_all(new_rows)
+                db.session.commit()
+            except Exception as e:
+                # Most likely another process seeded the same words first
+                db.session.rollback()
+                logger.error(f"Failed to seed the vocabulary table from the sheet word list: {e}")
+                return False
+            cls._seeded = True
+            if new_rows:
+                logger.info(f"Seeded {len(new_rows)} words from the sheet word list into the vocabulary table")
+            return True
+
+    @classmethod
+    def sample_unlearned_words(cls, username, max_count=1, limit=20, enriched_only=False) -> list:
+        """
+        Up to limit words the user has answered correctly fewer than max_count times (any word when
+        max_count is None), starting at a random point of the sample_key index and wrapping around.
+        The user's word_counts rows are anti-joined on their primary key, so the cost depends on limit
+        and the number of words the user has learned, not on the size of the vocabulary.
+        With enriched_only only words that already have a word_data row are returned.
+        """
+        query = db.session.query(cls.word)
+        if max_count is not None:
+            query = query.outerjoin(
+                WordCount, db.and_(WordCount.word == cls.word, WordCount.updated_by == username)
+            ).filter(func.coalesce(WordCount.count, 0) < max_count)
+        if enriched_only:
+            query = query.join(WordData, WordData.word == cls.word)
+
+        pivot = random.random()
+        words = [row.word for row in query.filter(cls.sample_key >= pivot).order_by(cls.sample_key).limit(limit)]
+        if len(words) < limit:
+            words += [row.word for row in
+                      query.filter(cls.sample_key < pivot).order_by(cls.sample_key).limit(limit - len(words))]
+        return words
+
+    @classmethod
+    def mark_for_push(cls, word, definition):
+        """Store a word and definition locally and flag it for the next push to Google Sheets."""
+        word = str(word).strip()
+        row = db.session.get(cls, word)
+        if row is None:
+            row = cls(word=word)
+            db.session.add(row)
+        row.definition = str(definition).strip()
+        row.needs_push = True
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to flag vocabulary word '{word}' for sync: {e}")
+
+    @classmethod
+    def clear_push(cls, words):
+        if not words:
+            return
+        cls.query.filter(cls.word.in_(list(words))).update({cls.needs_push: False}, synchronize_session=False)
+        db.session.commit()
+
+
+class SimilarWords(db.Model):
+    """Cached similar-words results per normalized word, including negative entries for failed lookups."""
+    __tablename__ = 'similar_words'
+    word = db.Column(db.String(150), primary_key=True)
+    similar_words = db.Column(JSON, nullable=True)
+    # 'ok' for a usable result, 'failed' for a cached failure
+    status = db.Column(db.String(10), nullable=False, default='ok')
+    # Entries written under another cache version (e.g. a different prompt) are ignored
+    version = db.Column(db.Integer, nullable=False, default=1)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    @classmethod
+    def lookup(cls, word, version):
+        """Return the unexpired entry for a normalized word written under this version, if any."""
+        entry = db.session.get(cls, word)
+        if entry is None or entry.version != version or entry.expires_at <= datetime.now():
+            return None
+        return entry
+
+    @classmethod
+    def store(cls, word, similar_words, status, version, ttl_seconds):
+        db.session.merge(cls(
+            word=word, similar_words=similar_words, status=status, version=version,
+            expires_at=datetime.now() + timedelta(seconds=ttl_seconds)
+        ))
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to cache similar words for '{word}': {e}")
+
+
+class MathProblem(db.Model):
+    """Bank of pre-generated math problems, looked up by (category, topic, difficulty)."""
+    __tablename__ = 'math_problems'
+    __table_args__ = (
+        db.Index('ix_math_problems_bucket', 'category', 'topic', 'difficulty'),
+    )
+    id = db.Column(db.String(36), primary_key=True)
+    question = db.Column(db.Text, nullable=False)
+    # A number or a string, as generated
+    correct_answer = db.Column(JSON, nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    topic = db.Column(db.String(100), nullable=False)
+    difficulty = db.Column(db.String(10), nullable=False)
+    explanation = db.Column(db.Text, nullable=True)
+    # Set when the explanation was generated here and still has to be written to the sheet
+    needs_push = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'question': self.question,
+            'correct_answer': self.correct_answer,
+            'category': self.category,
+            'topic': self.topic,
+            'difficulty': self.difficulty,
+            'explanation': self.explanation or '',
+        }
+
+    @classmethod
+    def pick(cls, category=None, topic=None, difficulty=None, exclude_ids=()):
+        """A random problem from one bucket (or from any bucket if none is given), skipping exclude_ids."""
+        query = cls.query
+        if category is not None:
+            query = query.filter_by(category=category, topic=topic, difficulty=difficulty)
+        if exclude_ids:
+            query = query.filter(cls.id.notin_([str(problem_id) for problem_id in exclude_ids]))
+        return query.order_by(func.random()).first()
+
+    @classmethod
+    def get_explanation(cls, problem_id):
+        problem = db.session.get(cls, str(problem_id))
+        return problem.explanation if problem else None
+
+    @classmethod
+    def set_explanation(cls, problem_id, explanation) -> bool:
+        """Stores a generated explanation and flags it for the sheet; False if the problem isn't banked."""
+        problem = db.session.get(cls, str(problem_id))
+        if problem is None:
+            return False
+        problem.explanation = explanation
+        problem.needs_push = True
+        db.session.commit()
+        return True
+
+    @classmethod
+    def missing_explanations(cls, limit=None) -> list:
+        query = cls.query.filter(db.or_(cls.explanation.is_(None), cls.explanation == '')).order_by(cls.created_at)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    @classmethod
+    def pending_explanations(cls) -> dict:
+        """{problem_id: explanation} for explanations not yet written to the sheet."""
+        return {problem.id: problem.explanation for problem in cls.query.filter_by(needs_push=True).all()}
+
+    @classmethod
+    def clear_push(cls, problem_ids):
+        if problem_ids:
+            cls.query.filter(cls.id.in_(list(problem_ids))).update({'needs_push': False}, synchronize_session=False)
+            db.session.commit()
+
+    @classmethod
+    def bucket_counts(cls) -> dict:
+        """Number of banked problems per (category, topic, difficulty)."""
+        rows = (
+            db.session.query(cls.category, cls.topic, cls.difficulty, func.count(cls.id))
+            .group_by(cls.category, cls.topic, cls.difficulty)
             .all()
         )
+        return {(category, topic, difficulty): count for category, topic, difficulty, count in rows}
 
-        # 2) Build dict with stripped/lowercased keys
-        count_dict = {row.word.strip().lower(): row.count for row in word_count_rows}
+    @classmethod
+    def add_problems(cls, problems) -> int:
+        """Inserts the problems whose id isn't banked yet and returns how many were added."""
+        problems = {str(problem['id']): problem for problem in problems if problem and problem.get('id') is not None}
+        if not problems:
+            return 0
+        existing = {row.id for row in db.session.query(cls.id).filter(cls.id.in_(list(problems))).all()}
+        added = 0
+        for problem_id, problem in problems.items():
+            if problem_id in existing:
+                continue
+            db.session.add(cls(
+                id=problem_id, question=problem['question'], correct_answer=problem['correct_answer'],
+                category=problem['category'], topic=problem['topic'], difficulty=problem['difficulty'],
+                explanation=problem.get('explanation') or None,
+            ))
+            added += 1
+        db.session.commit()
+        return added
 
-        # 3) Compare with a normalized version of each word in all_words
-        unlearned_words = []
-        for raw_word in all_words:
-            # Strip + lowercase to match our dict keys
-            clean_word = raw_word.strip().lower()
 
-            # .get() returns None if not found; default to 0
-            current_count = count_dict.get(clean_word, 0)
+class GenerationLease(db.Model):
+    """Short-lived lock row so only one worker process generates content for a key at a time."""
+    __tablename__ = 'generation_leases'
+    key = db.Column(db.String(200), primary_key=True)
+    owner = db.Column(db.String(32), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
 
-            if current_count < max_count:
-                unlearned_words.append(raw_word)  # Or clean_word—whichever you want
+    @classmethod
+    def acquire(cls, key, ttl_seconds):
+        """Takes the lease for key if it is free or expired; returns an owner token, or None if it is held."""
+        from uuid import uuid4
+        from sqlalchemy.exc import IntegrityError
+        owner = uuid4().hex
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        try:
+            db.session.add(cls(key=key, owner=owner, expires_at=expires_at))
+            db.session.commit()
+            return owner
+        except IntegrityError:
+            db.session.rollback()
+        # Take over a lease whose holder died without releasing it
+        taken = (
+            cls.query.filter(cls.key == key, cls.expires_at < now)
+            .update({'owner': owner, 'expires_at': expires_at}, synchronize_session=False)
+        )
+        db.session.commit()
+        return owner if taken else None
 
-        logger.info(f"unlearned word count: {len(unlearned_words)}")
-        return unlearned_words
\ No newline at end of file
+    @classmethod
+    def release(cls, key, owner):
+        cls.query.filter_by(key=key, owner=owner).delete(synchronize_session=False)
+        db.session.commit()
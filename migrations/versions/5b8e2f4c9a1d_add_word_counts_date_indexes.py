@@ -0,0 +1,39 @@
+"""Add indexes for the dashboard and daily-limit queries on word_counts
+
+Revision ID: 5b8e2f4c9a1d
+Revises: 2367dbbdb157
+Create Date: 2026-10-18 10:12:41.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e2f4c9a1d'
+down_revision = '2367dbbdb157'
+branch_labels = None
+depends_on = None
+
+# Index name -> columns; the daily-limit check filters on user and time, the dashboard on time only
+INDEXES = {
+    'ix_word_counts_updated_by_updated_at': ['updated_by', 'updated_at'],
+    'ix_word_counts_updated_at': ['updated_at'],
+}
+
+
+def upgrade():
+    # Databases created by db.create_all() may already have the indexes
+    inspector = sa.inspect(op.get_bind())
+    existing = {index['name'] for index in inspector.get_indexes('word_counts')}
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, 'word_counts', columns, unique=False)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = {index['name'] for index in inspector.get_indexes('word_counts')}
+    for name in INDEXES:
+        if name in existing:
+            op.drop_index(name, table_name='word_counts')
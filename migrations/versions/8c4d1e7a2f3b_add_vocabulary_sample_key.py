@@ -0,0 +1,54 @@
+"""Add a random sample key to vocabulary for picking the next quiz word
+
+Revision ID: 8c4d1e7a2f3b
+Revises: 5b8e2f4c9a1d
+Create Date: 2026-10-18 14:03:27.519842
+
+"""
+import random
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4d1e7a2f3b'
+down_revision = '5b8e2f4c9a1d'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_vocabulary_sample_key'
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    # The vocabulary table is created by db.create_all(), which also adds the column on new databases
+    if 'vocabulary' not in inspector.get_table_names():
+        return
+    if 'sample_key' in {column['name'] for column in inspector.get_columns('vocabulary')}:
+        return
+
+    with op.batch_alter_table('vocabulary', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sample_key', sa.Float, nullable=True))
+
+    # Backfill from Python so every database gets the same uniform [0, 1) keys
+    vocabulary = sa.table('vocabulary', sa.column('word', sa.String), sa.column('sample_key', sa.Float))
+    words = [row.word for row in conn.execute(sa.select(vocabulary.c.word))]
+    for word in words:
+        conn.execute(vocabulary.update().where(vocabulary.c.word == word).values(sample_key=random.random()))
+
+    with op.batch_alter_table('vocabulary', schema=None) as batch_op:
+        batch_op.alter_column('sample_key', existing_type=sa.Float, nullable=False)
+        batch_op.create_index(INDEX_NAME, ['sample_key'], unique=False)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'vocabulary' not in inspector.get_table_names():
+        return
+    if 'sample_key' not in {column['name'] for column in inspector.get_columns('vocabulary')}:
+        return
+    with op.batch_alter_table('vocabulary', schema=None) as batch_op:
+        if INDEX_NAME in {index['name'] for index in inspector.get_indexes('vocabulary')}:
+            batch_op.drop_index(INDEX_NAME)
+        batch_op.drop_column('sample_key')
@@ -1,8 +1,13 @@
 import datetime
-from flask import Blueprint, render_template, request
+import hmac
+from flask import Blueprint, render_template, request, jsonify, Response
 from flask_login import login_required, current_user
+from config import Config
 from database.models import WordCount
 from services.dashboard_service import DashboardService
+from services.llm_metrics import LLMMetrics
+from services.openai_service import generation_path_counts
+from services.similar_words_service import get_similar_words_stats
 import logging
 logger = logging.getLogger(__name__)
 
@@ -55,4 +60,24 @@ def dashboard():
         limit_reached=limit_reached,
         logged_user=logged_user
 
-    )
\ No newline at end of file
+    )
+
+@dashboard_blueprint.route('/metrics', methods=['GET'])
+@login_required
+def metrics():
+    """LLM call counters, latency histograms, token usage and cache hit counts for this process."""
+    return jsonify({
+        'llm': LLMMetrics.snapshot(),
+        'question_generation_paths': dict(generation_path_counts),
+        'similar_words_cache': get_similar_words_stats(),
+    })
+
+@dashboard_blueprint.route('/metrics/prometheus', methods=['GET'])
+def prometheus_metrics():
+    """The LLM metrics in Prometheus text format, for scrapers that authenticate with METRICS_TOKEN."""
+    if not Config.METRICS_TOKEN:
+        return jsonify({'error': 'Metrics scraping is not configured'}), 404
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(token.encode(), Config.METRICS_TOKEN.encode()):
+        return jsonify({'error': 'Invalid metrics token'}), 401
+    return Response(LLMMetrics.prometheus_text(), mimetype='text/plain; version=0.0.4')
@@ -1,7 +1,8 @@
 import datetime
 from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify
 from flask_login import login_required, current_user
-from services.math_service import get_next_math_problem, check_math_answer, reset_math_score, get_math_summary
+from services.math_service import get_next_math_problem, check_math_answer, reset_math_score, get_math_summary, stream_problem_explanation
+from services.sse_service import event_stream_response
 import logging
 logger = logging.getLogger(__name__)
 
@@ -47,14 +48,15 @@ def math_game():
             # Keep as string if not a number
             pass
 
-        # Check the user's answer
-        result_data = check_math_answer(user_answer, problem, correct_answer)
+        # Check the user's answer; a missing explanation is streamed by the page instead of generated here
+        result_data = check_math_answer(user_answer, problem, correct_answer, generate_explanation=False)
         session['math_score'] = result_data['updated_score']
         
         # Increment the daily problem count if not already done for this problem
         if session.get('last_problem_id') != problem['id']:
             session['math_problems_today'] = todays_problem_count + 1
             session['last_problem_id'] = problem['id']
+        session['math_answer_status'] = result_data['answer_status']
 
         # Mark the session as modified to save changes
         session.modified = True
@@ -69,7 +71,8 @@ def math_game():
             answer_status=result_data['answer_status'],
             score=session['math_score'],
             show_next_question=True,
-            explanation=result_data.get('explanation', '')
+            explanation=result_data.get('explanation', ''),
+            stream_explanation=result_data['answer_status'] == 'incorrect' and not result_data.get('explanation')
         )
     else:
         # GET request: Initialize a new problem
@@ -78,6 +81,7 @@ def math_game():
         problem_data = get_next_math_problem()
         session['math_problem'] = problem_data['problem']
         session['math_correct_answer'] = problem_data['correct_answer']
+        session.pop('math_answer_status', None)
 
         # Render the question page
         return render_template(
@@ -90,6 +94,19 @@ def math_game():
             explanation=""
         )
 
+@math_game_blueprint.route('/stream_explanation', methods=['GET'])
+@login_required
+def stream_explanation():
+    """Server-Sent Events stream of the explanation for the problem answered last."""
+    problem = session.get('math_problem')
+    correct_answer = session.get('math_correct_answer')
+    if not problem or correct_answer is None:
+        return jsonify({'error': 'No problem to explain'}), 400
+    # The explanation gives the answer away, so only explain a problem that was already answered wrong
+    if session.get('last_problem_id') != problem['id'] or session.get('math_answer_status') != 'incorrect':
+        return jsonify({'error': 'Answer the problem before asking for its explanation'}), 400
+    return event_stream_response(stream_problem_explanation(problem, correct_answer))
+
 @math_game_blueprint.route('/summary', methods=['GET'])
 @login_required
 def summary():
@@ -1,10 +1,12 @@
 import datetime
-from flask import Blueprint, render_template, session, redirect, url_for, request
+from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify
 from flask_login import login_required, current_user
-from database.models import WordData, WordCount
-from services.vocab_service import reset_score, get_next_question, check_answer, get_summary
-from services.google_sheet_service import GoogleSheetsService
 from config import Config
+from database.models import DailyAttempts, Vocabulary
+from services.vocab_service import reset_score, get_next_question, check_answer, get_summary
+from services.google_sheet_service import get_cached_words, get_sheet_words
+from services import similar_words_service
+from services.sse_service import event_stream_response
 import logging
 logger = logging.getLogger(__name__)
 
@@ -22,10 +24,10 @@ def vocab_game():
     """Handles the vocabulary game logic."""
     if 'score' not in session:
         session['score'] = {'correct': 0, 'incorrect': 0}
-    # Check if the user has attempted 50 questions from the DB and redirect to dashboard saying you have reached the limit
-    todays_user_word_count = WordCount.get_todays_user_word_count()
-    logger.info(f"Today's user word count: {str(todays_user_word_count)}")
-    if todays_user_word_count >= 120:
+    # Check if the user has reached today's answer limit and redirect to dashboard saying you have reached the limit
+    todays_attempts = DailyAttempts.get_today(current_user.username)
+    logger.info(f"Today's user attempts: {todays_attempts}")
+    if todays_attempts >= Config.DAILY_VOCAB_ATTEMPT_LIMIT:
         return redirect(url_for('dashboard_blueprint.dashboard', limit_reached=True))
 
     if request.method == 'POST':
@@ -61,33 +63,25 @@ def vocab_game():
         )
     else:
         # GET request: Initialize a new question
-        service_account_file_info = Config.GOOGLE_CREDENTIALS_JSON
-        spreadsheet_id = Config.SPREADSHEET_ID
-        sheets_service = GoogleSheetsService(service_account_file_info, spreadsheet_id)
-
-        # Always reload words from Google Sheets to get latest updates
-        all_words = sheets_service.load_words()
-        
-        # Log the words loaded from Google Sheets
-        logger.info(f"Loaded {len(all_words)} words from Google Sheets")
-        
-        # For debugging, log the first few words if available
-        if all_words and len(all_words) > 0:
-            sample = all_words[:min(5, len(all_words))]
-            logger.info(f"Sample words: {sample}")
-            
-        session['all_words'] = all_words
-        
-        # Exclude words that have been presented more than 10 times
-
-        unlearned_words = WordData.get_unlearned_words(all_words, max_count=1)
-        logger.info(f"Found {len(unlearned_words)} unlearned words")
-        
-        # If no unlearned words, just use all words (this means all have been seen at least once)
-        if not unlearned_words and all_words:
-            logger.info("No unlearned words found, using all available words instead")
-            unlearned_words = all_words
-            
+        # Words come from the local vocabulary table, kept in step with Google Sheets by `flask sync-vocab`;
+        # until that has run, the table is filled from the process-wide cache of the sheet on first use.
+        if Vocabulary.ensure_seeded(get_sheet_words):
+            # Sample a few words the user hasn't learned yet, preferring ones the background worker has already
+            # enriched so the question needs no LLM call; once every word is learned, sample from all of them.
+            username = current_user.username
+            unlearned_words = (
+                Vocabulary.sample_unlearned_words(username, max_count=1, enriched_only=True)
+                or Vocabulary.sample_unlearned_words(username, max_count=1)
+            )
+            if not unlearned_words:
+                logger.info("No unlearned words found, using all available words instead")
+                unlearned_words = Vocabulary.sample_unlearned_words(username, max_count=None)
+        else:
+            # Google Sheets is unreachable and the table may only hold words stored while serving questions
+            logger.warning("Vocabulary table is not seeded yet, using the fallback word list")
+            unlearned_words = list(get_cached_words())
+        logger.info(f"Sampled {len(unlearned_words)} candidate words")
+
         if not unlearned_words:
             # If all words are learned and no words available at all
             logger.error("No words available at all. This should not happen with our default words.")
@@ -123,15 +117,27 @@ def vocab_game():
 @vocab_game_blueprint.route('/get_similar_words', methods=['POST'])
 @login_required
 def get_similar_words():
-    from flask import jsonify
-    from services.openai_service import fetch_similar_words
     word = request.form.get('word')
     if not word:
         return jsonify({'error': 'No word provided'}), 400
     
-    similar_words = fetch_similar_words(word, num_words=4)
+    similar_words = similar_words_service.get_similar_words(word, num_words=4)
     return jsonify({'similar_words': similar_words})
 
+@vocab_game_blueprint.route('/stream_similar_words', methods=['GET'])
+@login_required
+def stream_similar_words():
+    """Server-Sent Events variant of /get_similar_words that sends the completion as it is generated."""
+    word = request.args.get('word')
+    if not word:
+        return jsonify({'error': 'No word provided'}), 400
+    return event_stream_response(similar_words_service.stream_similar_words(word, num_words=4))
+
+@vocab_game_blueprint.route('/similar_words_stats', methods=['GET'])
+@login_required
+def similar_words_stats():
+    return jsonify(similar_words_service.get_similar_words_stats())
+
 @vocab_game_blueprint.route('/summary', methods=['GET'])
 @login_required
 def summary():
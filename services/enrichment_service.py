@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy.exc import IntegrityError
+from database.db import db
+from database.models import Vocabulary, WordData
+from services.openai_service import call_budget, fetch_question_material
+from services.single_flight import SingleFlight, run_with_lease
+import logging
+logger = logging.getLogger(__name__)
+
+# Words currently being generated by this process
+_word_flights = SingleFlight()
+
+def enrich_word(word, num_options=3):
+    """
+    Generates and stores the definition and incorrect options for a word that isn't in word_data yet.
+    Returns the generated material, or None if the word was already enriched. Placeholder material
+    (returned while the API is rate limited or down) is passed back but never stored.
+    Concurrent calls for the same word, in this process or in other workers, share one generation.
+    """
+    word = word.strip()
+    if WordData.word_exists(word):
+        return None
+    key = f"word:{word.lower()}"
+    return _word_flights.do(key, lambda: run_with_lease(
+        key, lambda: _generate_word(word, num_options), is_done=lambda: WordData.word_exists(word)
+    ))
+
+
+def _generate_word(word, num_options):
+    # Another worker may have finished the word while we waited for the lease
+    if WordData.word_exists(word):
+        return None
+    material = fetch_question_material(word, num_options=num_options)
+    if material.get('placeholder'):
+        logger.warning(f"Not storing placeholder question material for '{word}'")
+        return material
+    word_data = WordData(word=word, definition=material['definition'],
+                         incorrect_options=json.dumps(material['incorrect_options']))
+    word_data.add_word_data()
+    return material
+
+
+def find_unenriched_words(limit=None) -> list:
+    """Vocabulary words that have no word_data row yet."""
+    query = (
+        db.session.query(Vocabulary.word)
+        .outerjoin(WordData, WordData.word == Vocabulary.word)
+        .filter(WordData.word.is_(None))
+        .order_by(Vocabulary.created_at, Vocabulary.word)
+    )
+    if limit:
+        query = query.limit(limit)
+    return [row.word for row in query.all()]
+
+
+class EnrichmentWorker:
+    """
+    Background worker that pre-generates question material for vocabulary words missing from
+    word_data, so quiz requests rarely wait on the LLM. At most max_workers words are generated at once.
+    """
+
+    def __init__(self, app, interval_seconds=60, max_workers=2, batch_size=10):
+        self.app = app
+        self.interval_seconds = interval_seconds
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.enriched = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="word-enrichment", daemon=True)
+        self._thread.start()
+        logger.info(f"Started word enrichment worker with {self.max_workers} concurrent generations")
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self) -> int:
+        """Enriches one batch of missing words and returns how many were generated."""
+        with self.app.app_context():
+            try:
+                words = find_unenriched_words(limit=self.batch_size)
+            finally:
+                db.session.remove()
+        if not words:
+            return 0
+        logger.info(f"Enriching {len(words)} words in the background")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="enrich") as executor:
+            results = list(executor.map(self._enrich, words))
+        return sum(1 for result in results if result)
+
+    def _enrich(self, word):
+        with self.app.app_context():
+            try:
+                material = enrich_word(word)
+                if material and material.get('placeholder'):
+                    # The API is degraded; the word stays unenriched and is retried on a later pass
+                    self.failed += 1
+                    return False
+                if material:
+                    self.enriched += 1
+                return material is not None
+            except Exception as e:
+                db.session.rollback()
+                self.failed += 1
+                logger.error(f"Error enriching word '{word}': {e}")
+                return False
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                generated = self.run_once()
+            except Exception as e:
+                logger.error(f"Word enrichment pass failed: {e}")
+                generated = 0
+            # Keep going while there is a backlog, otherwise wait for new words
+            if not generated:
+                self._stop.wait(self.interval_seconds)
+
+
+class RateBudget:
+    """Blocks callers so that at most rpm requests and tpm tokens are spent in any 60 second window."""
+
+    def __init__(self, rpm, tpm, window_seconds=60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window_seconds = window_seconds
+        self._spent = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._spent and now - self._spent[0][0] >= self.window_seconds:
+                    self._tokens_in_window -= self._spent.popleft()[1]
+                within_rpm = not self.rpm or len(self._spent) < self.rpm
+                within_tpm = not self.tpm or not self._spent or self._tokens_in_window + tokens <= self.tpm
+                if within_rpm and within_tpm:
+                    self._spent.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+                wait = self.window_seconds - (now - self._spent[0][0])
+            time.sleep(max(wait, 0.01))
+
+
+def load_checkpoint(path) -> set:
+    """Words already enriched by an earlier run, one per line."""
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as checkpoint:
+        return {line.strip() for line in checkpoint if line.strip()}
+
+
+def bulk_enrich(words, concurrency=4, rpm=500, tpm=200000, checkpoint_path=None, batch_size=50, progress=None):
+    """
+    Enriches many words concurrently while staying within a requests- and tokens-per-minute budget.
+    Results are bulk-inserted into word_data (and the vocabulary table) every batch_size words, and the
+    finished words are appended to checkpoint_path so an interrupted run can resume where it stopped.
+    progress(done, failed, total, elapsed_seconds) is called after every batch.
+    """
+    done_words = load_checkpoint(checkpoint_path)
+    existing = {row.word for row in db.session.query(WordData.word).all()}
+    pending = []
+    seen = set()
+    for word in words:
+        word = word.strip()
+        if word and word not in seen and word not in existing and word not in done_words:
+            seen.add(word)
+            pending.append(word)
+
+    total = len(pending)
+    logger.info(f"Bulk enriching {total} words ({len(words) - total} skipped as done or duplicate)")
+    budget = RateBudget(rpm, tpm)
+    started = time.monotonic()
+    done = 0
+    failed = 0
+    batch = []
+
+    def generate(word):
+        # Charged per API call, so the two-step fallback for an unparsable reply counts every call it makes
+        with call_budget(budget.acquire):
+            return fetch_question_material(word, num_options=3)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bulk-enrich") as executor:
+        futures = {executor.submit(generate, word): word for word in pending}
+        for future in as_completed(futures):
+            word = futures[future]
+            try:
+                material = future.result()
+                if material.get('placeholder'):
+                    # Left out of the batch and the checkpoint so a later run retries it
+                    failed += 1
+                else:
+                    batch.append((word, material))
+            except Exception as e:
+                failed += 1
+                logger.error(f"Error enriching word '{word}': {e}")
+            if len(batch) >= batch_size:
+                done += _save_batch(batch, checkpoint_path)
+                batch = []
+                if progress:
+                    progress(done, failed, total, time.monotonic() - started)
+        if batch:
+            done += _save_batch(batch, checkpoint_path)
+    if progress:
+        progress(done, failed, total, time.monotonic() - started)
+    return {'total': total, 'enriched': done, 'failed': failed, 'elapsed_seconds': time.monotonic() - started}
+
+
+def _save_batch(batch, checkpoint_path, attempts=3):
+    words = [word for word, _ in batch]
+    for attempt in range(attempts):
+        # Another worker may have enriched some of these meanwhile, even between this query and the commit
+        existing = {row.word for row in db.session.query(WordData.word).filter(WordData.word.in_(words)).all()}
+        in_vocabulary = {row.word for row in db.session.query(Vocabulary.word).filter(Vocabulary.word.in_(words)).all()}
+        for word, material in batch:
+            if word not in existing:
+                db.session.add(WordData(word=word, definition=material['definition'],
+                                        incorrect_options=json.dumps(material['incorrect_options'])))
+            if word not in in_vocabulary:
+                # New words join the quiz and are pushed to the sheet by the next sync
+                db.session.add(Vocabulary(word=word, definition=material['definition'], needs_push=True))
+        try:
+            db.session.commit()
+            break
+        except IntegrityError as e:
+            db.session.rollback()
+            if attempt == attempts - 1:
+                raise
+            logger.warning(f"Words in the batch were stored concurrently, retrying without them: {e.orig}")
+
+    if checkpoint_path:
+        with open(checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+            checkpoint.write(''.join(f"{word}\n" for word in words))
+    return len(batch)
+
+
+def start_enrichment_worker(app, interval_seconds, max_workers, batch_size):
+    return EnrichmentWorker(app, interval_seconds, max_workers, batch_size).start()
@@ -1,31 +1,220 @@
+import atexit
+import hashlib
 import json
+import re
+import threading
+import time
+from datetime import datetime
 import gspread
 from google.oauth2.service_account import Credentials
 import logging
 logger = logging.getLogger(__name__)
 
-class GoogleSheetsService:
-    def __init__(self, service_account_info, spreadsheet_id):
-        self.service_account_info = json.loads(service_account_info)
-        self.spreadsheet_id = spreadsheet_id
-        self.gc = self._authorize()
-        self.worksheet = self._get_worksheet('Vocabulary')  # Default to vocabulary worksheet
+# Seeded into an empty Vocabulary worksheet
+DEFAULT_WORDS = (
+    "abase", "abate", "abdicate", "aberrant", "abeyance", "abhor", "abject", "abjure",
+    "abnegate", "abominate", "aboriginal", "abortive", "abrasive", "abrogate", "abscond",
+    "absolution", "abstain", "abstemious", "abstruse", "abundant", "abut", "abysmal",
+    "accede", "accessible", "accessory", "acclaimed", "accolade", "accomplish", "accord",
+    "accost", "acerbic", "acme", "acquiesce", "acquisitive", "acrimonious", "acumen"
+)
+
+# Served when Google Sheets cannot be reached
+FALLBACK_WORDS = DEFAULT_WORDS[:15]
+
+# Definition written next to seeded default words until a real one is fetched
+PLACEHOLDER_DEFINITION = "Definition will be fetched automatically"
+
+class SheetsClientRegistry:
+    """
+    Per-process registry of authorized gspread clients and their spreadsheet and
+    worksheet handles, shared by every GoogleSheetsService instance and thread.
+    The underlying AuthorizedSession refreshes the access token only once it expires.
+    """
+    _clients = {}
+    _spreadsheets = {}
+    _worksheets = {}
+    _lock = threading.RLock()
+    _client_factory = None
+
+    @classmethod
+    def set_client_factory(cls, factory) -> None:
+        """
+        Build clients with factory(service_account_info) instead of authorizing against Google,
+        e.g. to run against a local stand-in. Pass None to restore the default.
+        """
+        with cls._lock:
+            cls._client_factory = factory
+            cls.reset()
+
+    @staticmethod
+    def _credentials_key(service_account_info) -> str:
+        return hashlib.sha256(str(service_account_info).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def get_client(cls, service_account_info):
+        """Return the shared client for these service-account credentials, authorizing once."""
+        key = cls._credentials_key(service_account_info)
+        client = cls._clients.get(key)
+        if client is not None:
+            return client
+        with cls._lock:
+            if key not in cls._clients:
+                logger.info("Authorizing Google Sheets client")
+                factory = cls._client_factory or cls._authorize
+                cls._clients[key] = factory(service_account_info)
+            return cls._clients[key]
 
-    def _authorize(self):
+    @classmethod
+    def get_spreadsheet(cls, service_account_info, spreadsheet_id):
+        """Return the shared spreadsheet handle, opening it once per process."""
+        key = (cls._credentials_key(service_account_info), spreadsheet_id)
+        spreadsheet = cls._spreadsheets.get(key)
+        if spreadsheet is not None:
+            return spreadsheet
+        with cls._lock:
+            if key not in cls._spreadsheets:
+                client = cls.get_client(service_account_info)
+                cls._spreadsheets[key] = client.open_by_key(spreadsheet_id)
+            return cls._spreadsheets[key]
+
+    @classmethod
+    def get_worksheet(cls, service_account_info, spreadsheet_id, sheet_name, opener):
+        """Return the shared worksheet handle, calling opener(spreadsheet) on first use."""
+        key = (cls._credentials_key(service_account_info), spreadsheet_id, sheet_name)
+        worksheet = cls._worksheets.get(key)
+        if worksheet is not None:
+            return worksheet
+        with cls._lock:
+            if key not in cls._worksheets:
+                spreadsheet = cls.get_spreadsheet(service_account_info, spreadsheet_id)
+                cls._worksheets[key] = opener(spreadsheet)
+            return cls._worksheets[key]
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget every cached client and handle, e.g. after rotating credentials."""
+        with cls._lock:
+            cls._clients.clear()
+            cls._spreadsheets.clear()
+            cls._worksheets.clear()
+
+    @staticmethod
+    def _authorize(service_account_info):
         """Authorize the Google Sheets API client."""
         scope = [
             'https://spreadsheets.google.com/feeds',
             'https://www.googleapis.com/auth/drive'
         ]
         credentials = Credentials.from_service_account_info(
-            self.service_account_info, scopes=scope
+            json.loads(service_account_info), scopes=scope
         )
         return gspread.authorize(credentials)
 
+
+class SheetRowIndex:
+    """
+    Per-process index from a worksheet's first-column keys to 1-based row numbers.
+    Built once from a single column read, extended as rows are appended, and rebuilt
+    after SHEET_INDEX_TTL_SECONDS to pick up rows appended by other processes.
+    """
+    _indexes = {}
+    _built_at = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def get(cls, index_key, load_column, normalize=str.lower) -> dict:
+        """Return the index for index_key, building it from load_column() when missing or expired."""
+        from config import Config
+        with cls._lock:
+            index = cls._indexes.get(index_key)
+            age = time.monotonic() - cls._built_at.get(index_key, float('-inf'))
+            if index is not None and age < Config.SHEET_INDEX_TTL_SECONDS:
+                return index
+            return cls.prime(index_key, load_column(), normalize)
+
+    @classmethod
+    def prime(cls, index_key, column_values, normalize=str.lower) -> dict:
+        """Rebuild the index from a full column read (row 1 is the header)."""
+        index = {}
+        for i, value in enumerate(column_values[1:], start=2):
+            value = str(value).strip()
+            if value:
+                index.setdefault(normalize(value), i)
+        with cls._lock:
+            cls._indexes[index_key] = index
+            cls._built_at[index_key] = time.monotonic()
+        return index
+
+    @classmethod
+    def record_append(cls, index_key, keys, append_response, normalize=str.lower) -> None:
+        """Add freshly appended keys using the row range reported by the append call."""
+        first_row = _first_appended_row(append_response)
+        with cls._lock:
+            index = cls._indexes.get(index_key)
+            if index is None:
+                return
+            if first_row is None:
+                # Can't tell where the rows landed; rebuild on the next lookup
+                cls.invalidate(index_key)
+                return
+            cls.add_keys(index_key, keys, first_row, normalize)
+
+    @classmethod
+    def add_keys(cls, index_key, keys, first_row, normalize=str.lower) -> None:
+        """Add keys found on consecutive rows starting at first_row."""
+        with cls._lock:
+            index = cls._indexes.get(index_key)
+            if index is None:
+                return
+            for offset, key in enumerate(keys):
+                key = str(key).strip()
+                if key:
+                    index.setdefault(normalize(key), first_row + offset)
+
+    @classmethod
+    def invalidate(cls, index_key=None) -> None:
+        with cls._lock:
+            if index_key is None:
+                cls._indexes.clear()
+                cls._built_at.clear()
+            else:
+                cls._indexes.pop(index_key, None)
+                cls._built_at.pop(index_key, None)
+
+
+def _first_appended_row(append_response):
+    """Return the first row number written by an append call, e.g. 38 for "'Vocabulary'!A38:C40"."""
+    try:
+        updated_range = append_response['updates']['updatedRange']
+    except (KeyError, TypeError):
+        return None
+    match = re.search(r'![A-Z]+(\d+)', updated_range)
+    return int(match.group(1)) if match else None
+
+
+class GoogleSheetsService:
+    def __init__(self, service_account_info, spreadsheet_id):
+        self.service_account_info = service_account_info
+        self.spreadsheet_id = spreadsheet_id
+        self.gc = SheetsClientRegistry.get_client(service_account_info)
+        self.worksheet = self._get_worksheet('Vocabulary')  # Default to vocabulary worksheet
+
+    @classmethod
+    def from_config(cls):
+        """Build a service for the configured spreadsheet using the shared client."""
+        from config import Config
+        return cls(Config.GOOGLE_CREDENTIALS_JSON, Config.SPREADSHEET_ID)
+
     def _get_worksheet(self, sheet_name='Vocabulary'):
-        """Get the specified worksheet of the spreadsheet."""
-        spreadsheet = self.gc.open_by_key(self.spreadsheet_id)
-        
+        """Get the specified worksheet of the spreadsheet, reusing the process-wide handle."""
+        return SheetsClientRegistry.get_worksheet(
+            self.service_account_info, self.spreadsheet_id, sheet_name,
+            lambda spreadsheet: self._open_worksheet(spreadsheet, sheet_name)
+        )
+
+    def _open_worksheet(self, spreadsheet, sheet_name):
+        """Open the specified worksheet, creating it with headers if it doesn't exist."""
         # Try to get the specified worksheet
         try:
             return spreadsheet.worksheet(sheet_name)
@@ -49,50 +238,67 @@ class GoogleSheetsService:
     def load_words(self):
         """Load words from the first column of the Vocabulary worksheet."""
         try:
-            # Make sure we're using the Vocabulary worksheet
-            self.worksheet = self._get_worksheet('Vocabulary')
-            values = self.worksheet.col_values(1)  # Get all values in column 1
-            words = values[1:]  # Skip the header row
-            
-            # If no words found, add some default vocabulary words to the worksheet
-            if not words:
-                logger.info("No words found in Google Sheets. Adding default vocabulary words.")
-                default_words = [
-                    "abase", "abate", "abdicate", "aberrant", "abeyance", "abhor", "abject", "abjure",
-                    "abnegate", "abominate", "aboriginal", "abortive", "abrasive", "abrogate", "abscond",
-                    "absolution", "abstain", "abstemious", "abstruse", "abundant", "abut", "abysmal",
-                    "accede", "accessible", "accessory", "acclaimed", "accolade", "accomplish", "accord",
-                    "accost", "acerbic", "acme", "acquiesce", "acquisitive", "acrimonious", "acumen"
-                ]
-                
-                # Add each word to the sheet
-                for word in default_words:
-                    try:
-                        # Add placeholder definition (will be replaced by OpenAI)
-                        from datetime import datetime
-                        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        self.worksheet.append_row([word, "Definition will be fetched automatically", timestamp])
-                        logger.info(f"Added default word '{word}' to Google Sheets")
-                    except Exception as e:
-                        logger.error(f"Error adding default word '{word}' to Google Sheets: {e}")
-                
-                # Return the default words
-                return default_words
-            
-            # Filter out empty strings and strings that only contain whitespace
-            words = [word for word in words if word and word.strip()]
-            
-            return words
+            return self._read_words()
         except Exception as e:
             logger.error(f"Error loading words from Google Sheets: {e}")
             # Return default words as fallback if there's an error
-            default_words = [
-                "abase", "abate", "abdicate", "aberrant", "abeyance", "abhor", "abject", "abjure",
-                "abnegate", "abominate", "aboriginal", "abortive", "abrasive", "abrogate", "abscond"
-            ]
             logger.info("Returning default vocabulary words due to Google Sheets error")
+            return list(FALLBACK_WORDS)
+
+    def _read_words(self):
+        """Read the word column from the Vocabulary worksheet, raising on API errors."""
+        # Make sure we're using the Vocabulary worksheet
+        self.worksheet = self._get_worksheet('Vocabulary')
+        values = self.worksheet.col_values(1)  # Get all values in column 1
+        SheetRowIndex.prime(self._index_key('Vocabulary'), values)
+        words = values[1:]  # Skip the header row
+
+        # If no words found, add some default vocabulary words to the worksheet
+        if not words:
+            logger.info("No words found in Google Sheets. Adding default vocabulary words.")
+            default_words = list(DEFAULT_WORDS)
+
+            # Add them with one append call, with a placeholder definition (will be replaced by OpenAI)
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            try:
+                response = self.worksheet.append_rows([[word, PLACEHOLDER_DEFINITION, timestamp] for word in default_words])
+                SheetRowIndex.record_append(self._index_key('Vocabulary'), default_words, response)
+                logger.info(f"Added {len(default_words)} default words to Google Sheets")
+            except Exception as e:
+                logger.error(f"Error adding default words to Google Sheets: {e}")
+
+            # Return the default words
             return default_words
-            
+
+        # Filter out empty strings and strings that only contain whitespace
+        words = [word for word in words if word and word.strip()]
+
+        return words
+
+    def load_vocabulary_rows(self):
+        """Return (word, definition) pairs from the Vocabulary worksheet with a single read."""
+        vocab_worksheet = self._get_worksheet('Vocabulary')
+        rows = [list(row) for row in vocab_worksheet.get('A1:B')]
+        SheetRowIndex.prime(self._index_key('Vocabulary'), [row[0] if row else '' for row in rows])
+        vocabulary = []
+        for row in rows[1:]:  # Skip the header row
+            word = row[0].strip() if row else ''
+            if not word:
+                continue
+            definition = row[1].strip() if len(row) > 1 else ''
+            if definition == PLACEHOLDER_DEFINITION:
+                definition = ''
+            vocabulary.append((word, definition))
+        return vocabulary
+
+    def _index_key(self, sheet_name):
+        return (self.spreadsheet_id, sheet_name)
+
+    def _vocabulary_row_index(self) -> dict:
+        """Case-insensitive word to row number index for the Vocabulary worksheet."""
+        vocab_worksheet = self._get_worksheet('Vocabulary')
+        return SheetRowIndex.get(self._index_key('Vocabulary'), lambda: vocab_worksheet.col_values(1))
+
     def save_vocabulary_word(self, word, definition):
         """Save a vocabulary word and its definition to the vocabulary worksheet."""
         try:
@@ -104,47 +310,80 @@ class GoogleSheetsService:
             if not word or not definition:
                 logger.warning("Skipping empty word or definition")
                 return False
-                
-            # Get the Vocabulary worksheet
-            vocab_worksheet = self._get_worksheet('Vocabulary')
             
             # Add timestamp as third column
-            from datetime import datetime
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Check if the word already exists
-            try:
-                word_col = vocab_worksheet.col_values(1)
-                word_lower = word.lower()
-                found = False
-                
-                # Case-insensitive search
-                for i, existing_word in enumerate(word_col):
-                    if existing_word and existing_word.lower() == word_lower:
-                        # Word exists, update its definition
-                        row_idx = i + 1  # +1 because sheets are 1-indexed
-                        vocab_worksheet.update_cell(row_idx, 2, definition)
-                        vocab_worksheet.update_cell(row_idx, 3, timestamp)
-                        logger.info(f"Updated definition for word '{word}' in Google Sheets")
-                        found = True
-                        break
-                
-                if not found:
-                    # Word doesn't exist, append new row
-                    vocab_worksheet.append_row([word, definition, timestamp])
-                    logger.info(f"Added new word '{word}' to Google Sheets")
-                
-                return True
-            except ValueError:
-                # Word not found, append it
-                vocab_worksheet.append_row([word, definition, timestamp])
-                logger.info(f"Added new word '{word}' to Google Sheets")
-                return True
-                
+            self.save_vocabulary_words([(word, definition, timestamp)])
+            return True
         except Exception as e:
             logger.error(f"Error saving vocabulary word to Google Sheets: {e}")
             return False
 
+    def save_vocabulary_words(self, entries):
+        """
+        Upsert several (word, definition, timestamp) entries into the vocabulary worksheet.
+        Existing words are found through the row index and updated with one ranged call;
+        new words are added with one append_rows call.
+        """
+        vocab_worksheet = self._get_worksheet('Vocabulary')
+        row_index = self._vocabulary_row_index()
+
+        updates = []
+        new_rows = []
+        for word, definition, timestamp in entries:
+            row_idx = row_index.get(word.lower())
+            if row_idx:
+                updates.append({'range': f'B{row_idx}:C{row_idx}', 'values': [[definition, timestamp]]})
+            else:
+                new_rows.append([word, definition, timestamp])
+
+        if len(updates) == 1:
+            vocab_worksheet.update(range_name=updates[0]['range'], values=updates[0]['values'])
+        elif updates:
+            vocab_worksheet.batch_update(updates)
+        if updates:
+            logger.info(f"Updated {len(updates)} vocabulary words in Google Sheets")
+        if new_rows:
+            response = vocab_worksheet.append_rows(new_rows)
+            SheetRowIndex.record_append(self._index_key('Vocabulary'), [row[0] for row in new_rows], response)
+            logger.info(f"Added {len(new_rows)} new vocabulary words to Google Sheets")
+        return len(updates) + len(new_rows)
+
+    def _math_problem_row_index(self) -> dict:
+        """Problem ID to row number index for the MathProblems worksheet."""
+        math_worksheet = self._get_worksheet('MathProblems')
+        return SheetRowIndex.get(self._index_key('MathProblems'), lambda: math_worksheet.col_values(1), normalize=str)
+
+    @staticmethod
+    def _math_problem_row(problem, timestamp):
+        """Build the worksheet row for a problem, or None if it has no ID or question."""
+        # Clean and prepare data
+        problem_id = str(problem.get('id', '')).strip()
+        question = str(problem.get('question', '')).strip()
+
+        # Skip if no ID or question
+        if not problem_id or not question:
+            logger.warning(f"Skipping problem with missing ID or question: {problem_id}")
+            return None
+
+        # Convert answer to string
+        answer = problem.get('correct_answer', '')
+        if isinstance(answer, (int, float)):
+            answer = str(answer)
+        else:
+            answer = str(answer).strip()
+
+        return [
+            problem_id,
+            question,
+            answer,
+            str(problem.get('category', '')).strip(),
+            str(problem.get('topic', '')).strip(),
+            str(problem.get('difficulty', '')).strip(),
+            str(problem.get('explanation', '')).strip(),
+            timestamp
+        ]
+
     def save_math_problem(self, problem):
         """Save a math problem to the MathProblems worksheet."""
         try:
@@ -152,115 +391,395 @@ class GoogleSheetsService:
             if not problem or not isinstance(problem, dict):
                 logger.warning("Invalid problem object - not saving to Google Sheets")
                 return False
-                
-            # Get the MathProblems worksheet
-            math_worksheet = self._get_worksheet('MathProblems')
-            
-            # Get current timestamp
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Clean and prepare data
-            problem_id = str(problem.get('id', '')).strip()
-            question = str(problem.get('question', '')).strip()
-            
-            # Skip if no ID or question
-            if not problem_id or not question:
-                logger.warning(f"Skipping problem with missing ID or question: {problem_id}")
+            if self._math_problem_row(problem, '') is None:
                 return False
-            
-            # Convert answer to string
-            answer = problem.get('correct_answer', '')
-            if isinstance(answer, (int, float)):
-                answer = str(answer)
-            else:
-                answer = str(answer).strip()
-            
-            # Prepare the row data
-            row_data = [
-                problem_id,
-                question,
-                answer,
-                str(problem.get('category', '')).strip(),
-                str(problem.get('topic', '')).strip(),
-                str(problem.get('difficulty', '')).strip(),
-                str(problem.get('explanation', '')).strip(),
-                timestamp
-            ]
-            
-            # Check if problem with this ID already exists
-            try:
-                id_col = math_worksheet.col_values(1)
-                if problem_id in id_col:
-                    # Problem exists, skip it to avoid duplicates
-                    logger.info(f"Problem ID {problem_id} already exists in Google Sheets, skipping")
-                    return True
-            except Exception as e:
-                logger.warning(f"Error checking for existing problem: {e}")
-            
-            # Append the row to the worksheet
-            math_worksheet.append_row(row_data)
-            logger.info(f"Saved math problem ID {problem_id} to Google Sheets")
+            self.save_math_problems([problem])
             return True
         except Exception as e:
             logger.error(f"Error saving math problem to Google Sheets: {e}")
             return False
-            
+
+    def save_math_problems(self, problems):
+        """
+        Save new math problems to the MathProblems worksheet with one append_rows call.
+        Problems whose ID is already in the sheet (or repeated in the batch) are skipped.
+        Returns the number of rows written.
+        """
+        math_worksheet = self._get_worksheet('MathProblems')
+        known_ids = self._math_problem_row_index()
+
+        # Get current timestamp
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        new_rows = []
+        batch_ids = set()
+        for problem in problems:
+            if not problem or not isinstance(problem, dict):
+                continue
+            row = self._math_problem_row(problem, timestamp)
+            if row is None:
+                continue
+            if row[0] in known_ids or row[0] in batch_ids:
+                # Problem exists, skip it to avoid duplicates
+                logger.info(f"Problem ID {row[0]} already exists in Google Sheets, skipping")
+                continue
+            batch_ids.add(row[0])
+            new_rows.append(row)
+
+        if not new_rows:
+            return 0
+
+        response = math_worksheet.append_rows(new_rows)
+        SheetRowIndex.record_append(self._index_key('MathProblems'), [row[0] for row in new_rows], response, normalize=str)
+        logger.info(f"Saved {len(new_rows)} math problems to Google Sheets")
+        return len(new_rows)
+
+    def save_math_explanations(self, explanations):
+        """
+        Write {problem_id: explanation} into the Explanation column of existing MathProblems rows
+        with one ranged call. Problems that aren't in the sheet are skipped. Returns the rows updated.
+        """
+        math_worksheet = self._get_worksheet('MathProblems')
+        row_index = self._math_problem_row_index()
+        updates = []
+        for problem_id, explanation in explanations.items():
+            row_idx = row_index.get(str(problem_id).strip())
+            if row_idx:
+                updates.append({'range': f'{MATH_EXPLANATION_COLUMN}{row_idx}', 'values': [[explanation]]})
+            else:
+                logger.warning(f"Problem ID {problem_id} is not in Google Sheets, not saving its explanation")
+
+        if len(updates) == 1:
+            math_worksheet.update(range_name=updates[0]['range'], values=updates[0]['values'])
+        elif updates:
+            math_worksheet.batch_update(updates)
+        if updates:
+            logger.info(f"Saved {len(updates)} math problem explanations to Google Sheets")
+        return len(updates)
+
     def load_math_problems(self):
-        """Load all math problems from the MathProblems worksheet."""
+        """Load all math problems from the MathProblems worksheet, raising on API errors."""
+        # Get the MathProblems worksheet
+        math_worksheet = self._get_worksheet('MathProblems')
+        return MathProblemMirror.for_spreadsheet(self.spreadsheet_id).sync(
+            math_worksheet, self._index_key('MathProblems')
+        )
+
+
+def _parse_int_or_text(value):
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _parse_answer(value):
+    # Try to convert to numeric if possible
+    try:
+        if '.' in value:
+            return float(value)
+        return int(value)
+    except ValueError:
+        return value
+
+
+# Column of the Explanation header in the rows written by _math_problem_row
+MATH_EXPLANATION_COLUMN = 'G'
+
+# Worksheet header -> (problem key, parser); the Created timestamp is not part of the problem object
+MATH_PROBLEM_COLUMNS = {
+    'ID': ('id', _parse_int_or_text),
+    'Answer': ('correct_answer', _parse_answer),
+    'Question': ('question', str),
+    'Explanation': ('explanation', str),
+    'Category': ('category', str),
+    'Topic': ('topic', str),
+    'Difficulty': ('difficulty', str),
+}
+
+
+class MathProblemMirror:
+    """
+    Per-process copy of the MathProblems worksheet.
+    The first load reads the whole sheet; later loads fetch only the rows after the
+    last one seen, at most once every MATH_SYNC_INTERVAL_SECONDS.
+    """
+    _mirrors = {}
+    _mirrors_lock = threading.Lock()
+
+    def __init__(self):
+        self.problems = []
+        self.columns = None
+        self.last_column = None
+        self.last_row = 0
+        self.synced_at = float('-inf')
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_spreadsheet(cls, spreadsheet_id):
+        with cls._mirrors_lock:
+            if spreadsheet_id not in cls._mirrors:
+                cls._mirrors[spreadsheet_id] = cls()
+            return cls._mirrors[spreadsheet_id]
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._mirrors_lock:
+            cls._mirrors.clear()
+
+    def sync(self, worksheet, index_key) -> list:
+        """Bring the local copy up to date if it is due, and return copies of all problems."""
+        from config import Config
+        with self.lock:
+            if self.columns is None:
+                self._load_all(worksheet, index_key)
+            elif time.monotonic() - self.synced_at >= Config.MATH_SYNC_INTERVAL_SECONDS:
+                self._load_new_rows(worksheet, index_key)
+            return [dict(problem) for problem in self.problems]
+
+    def _load_all(self, worksheet, index_key):
+        all_values = worksheet.get_all_values()
+        # The ID column comes for free with the full read, so refresh the ID index from it
+        SheetRowIndex.prime(index_key, [row[0] if row else '' for row in all_values], normalize=str)
+        self.synced_at = time.monotonic()
+        # Skip header row
+        if len(all_values) <= 1:  # Only header row or empty; retry the full read next time
+            return
+        self._set_headers(all_values[0])
+        self.problems = self._parse_rows(all_values[1:])
+        self.last_row = len(all_values)
+
+    def _load_new_rows(self, worksheet, index_key):
+        first_row = self.last_row + 1
+        new_rows = worksheet.get(f'A{first_row}:{self.last_column}')
+        self.synced_at = time.monotonic()
+        if not new_rows:
+            return
+        new_rows = [list(row) for row in new_rows]
+        SheetRowIndex.add_keys(index_key, [row[0] if row else '' for row in new_rows], first_row, normalize=str)
+        self.problems.extend(self._parse_rows(new_rows))
+        self.last_row += len(new_rows)
+        logger.info(f"Fetched {len(new_rows)} new math problem rows from Google Sheets")
+
+    def _set_headers(self, headers):
+        # Map header positions to problem keys once instead of per cell
+        self.columns = [
+            (i,) + MATH_PROBLEM_COLUMNS[header]
+            for i, header in enumerate(headers) if header in MATH_PROBLEM_COLUMNS
+        ]
+        self.last_column = gspread.utils.rowcol_to_a1(1, max(len(headers), 1))[:-1]
+
+    def _parse_rows(self, rows):
+        problems = []
+        for row in rows:
+            problem = {key: parse(row[i]) for i, key, parse in self.columns if i < len(row)}
+            if problem:  # Only add non-empty problems
+                problems.append(problem)
+        return problems
+
+
+class VocabularyWriteBuffer:
+    """
+    Process-wide write-behind buffer for vocabulary upserts.
+    Writes for the same word are merged, and a background thread flushes them to
+    Google Sheets as one batch on a timer or once the size threshold is reached.
+    Pending writes are drained when the process exits.
+    """
+    _pending = {}
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _wakeup = threading.Event()
+    _worker = None
+    _flush_listeners = []
+
+    @classmethod
+    def add_flush_listener(cls, listener) -> None:
+        """Call listener(entries) with the (word, definition, timestamp) entries of each successful flush."""
+        cls._flush_listeners.append(listener)
+
+    @classmethod
+    def add(cls, word, definition) -> bool:
+        """Queue a word and definition for the next flush, replacing any pending write for the word."""
+        from config import Config
+        word = str(word).strip()
+        definition = str(definition).strip()
+
+        # Skip empty words or definitions
+        if not word or not definition:
+            logger.warning("Skipping empty word or definition")
+            return False
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with cls._lock:
+            cls._pending[word.lower()] = (word, definition, timestamp)
+            pending_count = len(cls._pending)
+            cls._ensure_worker()
+
+        if pending_count >= Config.SHEETS_FLUSH_BATCH_SIZE:
+            cls._wakeup.set()
+        return True
+
+    @classmethod
+    def pending_count(cls) -> int:
+        with cls._lock:
+            return len(cls._pending)
+
+    @classmethod
+    def flush(cls) -> int:
+        """Write every pending entry to Google Sheets and return the number of rows written."""
+        with cls._flush_lock:
+            with cls._lock:
+                batch = cls._pending
+                cls._pending = {}
+            if not batch:
+                return 0
+            entries = list(batch.values())
+            try:
+                written = GoogleSheetsService.from_config().save_vocabulary_words(entries)
+            except Exception as e:
+                logger.error(f"Error flushing {len(batch)} vocabulary words to Google Sheets: {e}")
+                with cls._lock:
+                    # Re-queue failed entries unless a newer write for the word arrived meanwhile
+                    for key, entry in batch.items():
+                        cls._pending.setdefault(key, entry)
+                return 0
+            for listener in cls._flush_listeners:
+                try:
+                    listener(entries)
+                except Exception as e:
+                    logger.error(f"Vocabulary flush listener failed: {e}")
+            return written
+
+    @classmethod
+    def drain(cls) -> None:
+        """Flush whatever is still pending; registered to run at interpreter shutdown."""
+        if cls.pending_count():
+            logger.info(f"Draining {cls.pending_count()} pending vocabulary writes")
+            cls.flush()
+
+    @classmethod
+    def _ensure_worker(cls) -> None:
+        # Called with cls._lock held
+        if cls._worker is None or not cls._worker.is_alive():
+            cls._worker = threading.Thread(target=cls._run, name="vocab-write-behind", daemon=True)
+            cls._worker.start()
+
+    @classmethod
+    def _run(cls) -> None:
+        from config import Config
+        while True:
+            cls._wakeup.wait(Config.SHEETS_FLUSH_INTERVAL_SECONDS)
+            cls._wakeup.clear()
+            cls.flush()
+
+
+atexit.register(VocabularyWriteBuffer.drain)
+
+
+class WordListCache:
+    """
+    Process-wide cache of the Vocabulary word list.
+    Fresh entries are served from memory; stale entries are served while a single
+    background thread reloads them from Google Sheets (stale-while-revalidate).
+    """
+    _words = None
+    _loaded_at = float('-inf')
+    _refreshing = False
+    # True while _words is FALLBACK_WORDS because Google Sheets couldn't be read
+    _is_fallback = False
+    _lock = threading.Lock()
+    _load_lock = threading.Lock()
+
+    @classmethod
+    def get_words(cls, ttl_seconds=None) -> tuple:
+        """Return the cached word list, loading it on first use and refreshing it once stale."""
+        from config import Config
+        ttl_seconds = Config.WORD_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+
+        with cls._lock:
+            words = cls._words
+            is_stale = time.monotonic() - cls._loaded_at >= ttl_seconds
+            start_refresh = words is not None and is_stale and not cls._refreshing
+            if start_refresh:
+                cls._refreshing = True
+
+        if words is None:
+            return cls._load_blocking()
+
+        if start_refresh:
+            logger.debug("Word list cache is stale, refreshing in the background")
+            threading.Thread(target=cls._refresh, name="word-list-refresh", daemon=True).start()
+        return words
+
+    @classmethod
+    def get_sheet_words(cls) -> tuple:
+        """Like get_words, but raises instead of returning the fallback list when the sheet can't be read."""
+        words = cls.get_words()
+        with cls._lock:
+            if cls._is_fallback and words is FALLBACK_WORDS:
+                raise RuntimeError("Google Sheets word list is unavailable, only the fallback list is cached")
+        return words
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Drop the cached word list so the next read reloads it from Google Sheets."""
+        with cls._lock:
+            cls._words = None
+            cls._loaded_at = float('-inf')
+            cls._is_fallback = False
+        logger.info("Word list cache invalidated")
+
+    @classmethod
+    def _load_blocking(cls) -> tuple:
+        # Only one request performs the cold load; concurrent requests wait for its result
+        with cls._load_lock:
+            with cls._lock:
+                if cls._words is not None:
+                    return cls._words
+            try:
+                words = tuple(cls._fetch())
+                cls._store(words)
+            except Exception as e:
+                logger.error(f"Error loading words from Google Sheets: {e}")
+                words = FALLBACK_WORDS
+                # Serve the fallback list but retry on the next read
+                cls._store(words, expired=True, is_fallback=True)
+            return words
+
+    @classmethod
+    def _refresh(cls) -> None:
         try:
-            # Get the MathProblems worksheet
-            math_worksheet = self._get_worksheet('MathProblems')
-            
-            # Get all values
-            all_values = math_worksheet.get_all_values()
-            
-            # Skip header row
-            if len(all_values) <= 1:  # Only header row or empty
-                return []
-                
-            # Extract data and convert to list of dictionaries
-            headers = all_values[0]
-            problems = []
-            
-            for row in all_values[1:]:
-                problem = {}
-                for i, header in enumerate(headers):
-                    if i < len(row):  # Ensure row has enough values
-                        # Handle special types (convert numeric strings)
-                        if header == 'ID':
-                            try:
-                                problem[header.lower()] = int(row[i])
-                            except ValueError:
-                                problem[header.lower()] = row[i]
-                        elif header == 'Answer':
-                            # Try to convert to numeric if possible
-                            try:
-                                if '.' in row[i]:
-                                    problem['correct_answer'] = float(row[i])
-                                else:
-                                    problem['correct_answer'] = int(row[i])
-                            except ValueError:
-                                problem['correct_answer'] = row[i]
-                        else:
-                            # Map header names to expected problem keys
-                            key = header.lower()
-                            if key == 'question':
-                                problem[key] = row[i]
-                            elif key == 'explanation':
-                                problem[key] = row[i]
-                            elif key == 'category':
-                                problem[key] = row[i]
-                            elif key == 'topic':
-                                problem[key] = row[i]
-                            elif key == 'difficulty':
-                                problem[key] = row[i]
-                            # Ignore created timestamp in problem object
-                
-                if problem:  # Only add non-empty problems
-                    problems.append(problem)
-            
-            return problems
+            cls._store(tuple(cls._fetch()))
+            logger.info("Word list cache refreshed from Google Sheets")
         except Exception as e:
-            logger.error(f"Error loading math problems from Google Sheets: {e}")
-            return []
\ No newline at end of file
+            # Keep serving the stale list; the next read retries the refresh
+            logger.error(f"Error refreshing word list cache: {e}")
+        finally:
+            with cls._lock:
+                cls._refreshing = False
+
+    @classmethod
+    def _fetch(cls) -> list:
+        return GoogleSheetsService.from_config()._read_words()
+
+    @classmethod
+    def _store(cls, words, expired=False, is_fallback=False) -> None:
+        with cls._lock:
+            cls._words = words
+            cls._loaded_at = float('-inf') if expired else time.monotonic()
+            cls._is_fallback = is_fallback
+
+
+def get_cached_words() -> tuple:
+    """Return the shared Vocabulary word list from the process-wide cache."""
+    return WordListCache.get_words()
+
+
+def get_sheet_words() -> tuple:
+    """Return the cached Vocabulary word list, raising while only the fallback list is available."""
+    return WordListCache.get_sheet_words()
+
+
+def invalidate_word_cache() -> None:
+    """Force the next word list read to reload from Google Sheets."""
+    WordListCache.invalidate()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+import openai
+from openai.error import APIError, RateLimitError
+import logging
+logger = logging.getLogger(__name__)
+
+
+def openai_create(**kwargs):
+    # Looked up on every call so tests can still patch openai.ChatCompletion.create
+    return openai.ChatCompletion.create(**kwargs)
+
+
+_backend = openai_create
+
+
+def set_backend(create):
+    """Route every chat completion through create(**kwargs); None restores the OpenAI API."""
+    global _backend
+    _backend = create or openai_create
+
+
+def get_backend():
+    return _backend
+
+
+def create(**kwargs):
+    return _backend(**kwargs)
+
+
+def configure_backend(name, latency_seconds=0.0, error_rate=0.0, rate_limit_rate=0.0):
+    """Selects the backend named by the LLM_BACKEND setting: 'openai' (the default) or 'fake'."""
+    if name == 'fake':
+        logger.warning("Using the local fake LLM backend, no OpenAI calls will be made")
+        set_backend(FakeLLM(latency_seconds=latency_seconds, error_rate=error_rate, rate_limit_rate=rate_limit_rate))
+    elif name == 'openai':
+        set_backend(None)
+    else:
+        raise ValueError(f"Unknown LLM backend '{name}'")
+
+
+_WORDS = (
+    'bright', 'calm', 'distant', 'eager', 'fragile', 'gentle', 'hollow', 'keen', 'lively', 'mellow',
+    'narrow', 'patient', 'quiet', 'rapid', 'steady', 'tender', 'vivid', 'wary', 'zealous', 'bold',
+)
+_PHRASES = (
+    'a feeling of', 'the habit of', 'a tendency towards', 'the state of being', 'an act of', 'the quality of',
+)
+
+
+class FakeLLM:
+    """
+    Deterministic stand-in for openai.ChatCompletion.create that needs no network.
+    It recognises the prompts in services/openai_service.py and returns well-formed replies for them:
+    definitions, incorrect options, combined question JSON, similar words, math problem JSON and explanations.
+    The same prompt always gets the same reply. latency_seconds is added to every call; error_rate and
+    rate_limit_rate are the chances of raising an APIError or a RateLimitError, drawn from a seeded sequence.
+    """
+
+    def __init__(self, latency_seconds=0.0, error_rate=0.0, rate_limit_rate=0.0, seed=0):
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.calls = Counter()
+        self._failures = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        prompt = kwargs['messages'][-1]['content']
+        kind, content = self._reply(prompt)
+        with self._lock:
+            self.calls[kind] += 1
+            draw = self._failures.random()
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if draw < self.rate_limit_rate:
+            raise RateLimitError("Fake rate limit reached")
+        if draw < self.rate_limit_rate + self.error_rate:
+            raise APIError("Fake API error")
+
+        usage = {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4}
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        if kwargs.get('stream'):
+            return self._stream(content)
+        return {
+            'object': 'chat.completion',
+            'model': kwargs.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': usage,
+        }
+
+    @property
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    @staticmethod
+    def _stream(content):
+        yield {'choices': [{'index': 0, 'delta': {'role': 'assistant'}}]}
+        for piece in re.findall(r'\S+\s*', content):
+            yield {'choices': [{'index': 0, 'delta': {'content': piece}}]}
+        yield {'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]}
+
+    def _reply(self, prompt):
+        rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+        subject = re.search(r"word '([^']+)'", prompt)
+        word = subject.group(1) if subject else 'word'
+        count = re.search(r'(?:Provide|provide|then provide) (\d+)', prompt)
+        count = int(count.group(1)) if count else 3
+
+        if 'Respond with JSON only' in prompt:
+            return 'question_material', json.dumps({
+                'definition': self._definition(rng, word),
+                'incorrect_options': [self._definition(rng, f'{word} {i}') for i in range(count)],
+            })
+        if 'similar or related words' in prompt:
+            words = rng.sample(_WORDS, count)
+            return 'similar_words', '\n'.join(f"{similar}: {self._definition(rng, similar)}" for similar in words)
+        if 'math word problem for a grammar school' in prompt:
+            fields = dict(re.findall(r'"(category|topic|difficulty)": "([^"]*)"', prompt))
+            a, b = rng.randint(2, 40), rng.randint(2, 40)
+            return 'math_problem', json.dumps({
+                'question': f"A shop has {a} boxes with {b} pencils in each box. How many pencils are there altogether?",
+                'correct_answer': a * b,
+                'category': fields.get('category', 'Number'),
+                'topic': fields.get('topic', 'Mental math'),
+                'difficulty': fields.get('difficulty', 'easy'),
+                'explanation': f"Multiply the number of boxes by the pencils in each box: {a} x {b} = {a * b}.",
+            })
+        if 'step-by-step explanation' in prompt:
+            answer = re.search(r'Answer: (.*)', prompt)
+            answer = answer.group(1).strip() if answer else 'the answer'
+            return 'explanation', (
+                f"Step 1: Read the problem and find the numbers you need. "
+                f"Step 2: Work out the calculation one step at a time. Step 3: The answer is {answer}."
+            )
+        if 'incorrect definitions' in prompt:
+            return 'incorrect_options', '\n'.join(
+                f"{i + 1}. {self._definition(rng, f'{word} {i}')}" for i in range(count)
+            )
+        if prompt.startswith('Define the word'):
+            return 'definition', self._definition(rng, word)
+        return 'other', 'OK.'
+
+    @staticmethod
+    def _definition(rng, word):
+        return f"{rng.choice(_PHRASES).capitalize()} being {rng.choice(_WORDS)} and {rng.choice(_WORDS)}."
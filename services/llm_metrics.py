@@ -0,0 +1,113 @@
+import bisect
+import threading
+from collections import Counter, defaultdict
+from flask import has_request_context, request
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+# USD per 1M (prompt, completion) tokens, used for the cost estimates
+MODEL_PRICES = {
+    'gpt-4o-mini-2024-07-18': (0.15, 0.60),
+}
+
+OUTCOMES = ('success', 'rate_limited', 'error', 'placeholder')
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+        return {'count': self.count, 'sum': round(self.sum, 6), 'buckets': buckets}
+
+
+class _Series:
+    def __init__(self):
+        self.outcomes = Counter()
+        self.latency = Histogram()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'calls': sum(self.outcomes.values()),
+            'outcomes': {outcome: self.outcomes[outcome] for outcome in OUTCOMES},
+            'latency_seconds': self.latency.to_dict(),
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cost_usd': round(self.cost_usd, 6),
+        }
+
+
+class LLMMetrics:
+    """
+    Process-wide counters and latency histograms for LLM calls, aggregated per feature (the
+    openai_service helper that made the call) and per Flask endpoint ('background' outside requests).
+    """
+    _lock = threading.Lock()
+    _by_feature = defaultdict(_Series)
+    _by_endpoint = defaultdict(_Series)
+
+    @classmethod
+    def record(cls, feature, outcome, latency_seconds, model=None, prompt_tokens=0, completion_tokens=0):
+        prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+        endpoint = (request.endpoint or 'unknown') if has_request_context() else 'background'
+        with cls._lock:
+            for series in (cls._by_feature[feature], cls._by_endpoint[endpoint]):
+                series.outcomes[outcome] += 1
+                series.latency.observe(latency_seconds)
+                series.prompt_tokens += prompt_tokens
+                series.completion_tokens += completion_tokens
+                series.cost_usd += cost
+
+    @classmethod
+    def snapshot(cls) -> dict:
+        with cls._lock:
+            return {
+                'features': {name: series.to_dict() for name, series in cls._by_feature.items()},
+                'endpoints': {name: series.to_dict() for name, series in cls._by_endpoint.items()},
+            }
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._by_feature.clear()
+            cls._by_endpoint.clear()
+
+    @classmethod
+    def prometheus_text(cls) -> str:
+        """The snapshot in the Prometheus text exposition format."""
+        snapshot = cls.snapshot()
+        lines = []
+        for label, group in (('feature', 'features'), ('endpoint', 'endpoints')):
+            prefix = f"llm_{label}"
+            for name, series in sorted(snapshot[group].items()):
+                tag = f'{label}="{name}"'
+                for outcome, count in series['outcomes'].items():
+                    lines.append(f'{prefix}_calls_total{{{tag},outcome="{outcome}"}} {count}')
+                for le, count in series['latency_seconds']['buckets'].items():
+                    lines.append(f'{prefix}_latency_seconds_bucket{{{tag},le="{le}"}} {count}')
+                lines.append(f'{prefix}_latency_seconds_sum{{{tag}}} {series["latency_seconds"]["sum"]}')
+                lines.append(f'{prefix}_latency_seconds_count{{{tag}}} {series["latency_seconds"]["count"]}')
+                lines.append(f'{prefix}_prompt_tokens_total{{{tag}}} {series["prompt_tokens"]}')
+                lines.append(f'{prefix}_completion_tokens_total{{{tag}}} {series["completion_tokens"]}')
+                lines.append(f'{prefix}_cost_usd_total{{{tag}}} {series["cost_usd"]}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,180 @@
+import threading
+from uuid import uuid4
+from database.db import db
+from database.models import MathProblem
+from services.math_service import MATH_CATEGORIES, DIFFICULTY_LEVELS
+from services.openai_service import generate_math_problem, generate_problem_explanation, is_placeholder
+from services.single_flight import run_with_lease
+import logging
+logger = logging.getLogger(__name__)
+
+
+def all_buckets() -> list:
+    """Every (category, topic, difficulty) combination the math game can ask for."""
+    return [
+        (category, topic, difficulty)
+        for category, topics in MATH_CATEGORIES.items()
+        for topic in topics
+        for difficulty in DIFFICULTY_LEVELS
+    ]
+
+
+def import_sheet_problems() -> int:
+    """Copies problems from the MathProblems worksheet into the bank and returns how many were new."""
+    from services.google_sheet_service import GoogleSheetsService
+    problems = GoogleSheetsService.from_config().load_math_problems()
+    added = MathProblem.add_problems(problems)
+    logger.info(f"Imported {added} of {len(problems)} math problems from Google Sheets into the bank")
+    return added
+
+
+def refill_bank(target_depth=3, max_problems=10) -> int:
+    """
+    Generates problems for the emptiest buckets until each holds target_depth problems, at most
+    max_problems per call. Each bucket is filled under a generation lease so workers don't duplicate
+    each other; new problems are stored in the bank, then saved to Google Sheets in one write.
+    Returns the number of problems added.
+    """
+    counts = MathProblem.bucket_counts()
+    deficits = [(counts.get(bucket, 0), bucket) for bucket in all_buckets() if counts.get(bucket, 0) < target_depth]
+    if not deficits:
+        return 0
+    deficits.sort(key=lambda deficit: deficit[0])
+
+    generated = []
+    for _, bucket in deficits:
+        if len(generated) >= max_problems:
+            break
+        # Buckets another worker is already filling are skipped rather than waited for
+        problems = run_with_lease(
+            "math:" + ":".join(bucket),
+            lambda: _fill_bucket(bucket, target_depth, max_problems - len(generated)),
+            wait=False,
+        )
+        generated.extend(problems or [])
+    if not generated:
+        return 0
+
+    try:
+        from services.google_sheet_service import GoogleSheetsService
+        GoogleSheetsService.from_config().save_math_problems(generated)
+    except Exception as e:
+        logger.error(f"Error saving generated math problems to Google Sheets: {e}")
+    logger.info(f"Added {len(generated)} math problems to the bank ({len(deficits)} buckets below depth {target_depth})")
+    return len(generated)
+
+
+def _fill_bucket(bucket, target_depth, limit):
+    category, topic, difficulty = bucket
+    # Count again under the lease, the bucket may have been filled since bucket_counts()
+    missing = target_depth - MathProblem.query.filter_by(category=category, topic=topic, difficulty=difficulty).count()
+    problems = []
+    for _ in range(min(missing, limit)):
+        problem = generate_math_problem(category=category, topic=topic, difficulty=difficulty)
+        if not problem:
+            continue
+        # File the problem under the bucket that was asked for, whatever the reply says
+        problem.update(id=str(uuid4())[:8], category=category, topic=topic, difficulty=difficulty)
+        problems.append(problem)
+    # Stored before the lease is released so the next holder counts them
+    MathProblem.add_problems(problems)
+    return problems
+
+
+def fill_missing_explanations(limit=None, progress=None) -> dict:
+    """
+    Generates explanations for banked problems that have none, then pushes them to Google Sheets.
+    progress(done, failed, total) is called after every problem.
+    """
+    problems = MathProblem.missing_explanations(limit=limit)
+    done = 0
+    failed = 0
+    for problem in problems:
+        explanation = generate_problem_explanation(problem.question, problem.correct_answer)
+        if explanation and not is_placeholder(explanation):
+            MathProblem.set_explanation(problem.id, explanation)
+            done += 1
+        else:
+            failed += 1
+        if progress:
+            progress(done, failed, len(problems))
+    return {'total': len(problems), 'generated': done, 'failed': failed, 'pushed': push_explanations()}
+
+
+def push_explanations() -> int:
+    """Writes explanations generated since the last push into the MathProblems worksheet."""
+    from services.google_sheet_service import GoogleSheetsService
+    pending = MathProblem.pending_explanations()
+    if not pending:
+        return 0
+    written = GoogleSheetsService.from_config().save_math_explanations(pending)
+    MathProblem.clear_push(pending)
+    return written
+
+
+class MathBankRefiller:
+    """
+    Background worker that keeps the math problem bank stocked, so serving a problem never waits on OpenAI.
+    The first pass imports the problems already in Google Sheets; every pass pushes new explanations to it.
+    """
+
+    def __init__(self, app, interval_seconds=60, target_depth=3, batch_size=10):
+        self.app = app
+        self.interval_seconds = interval_seconds
+        self.target_depth = target_depth
+        self.batch_size = batch_size
+        self._imported = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="math-bank-refill", daemon=True)
+        self._thread.start()
+        logger.info(f"Started math problem bank refill every {self.interval_seconds} seconds")
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self) -> int:
+        """
+        Imports the sheet until that succeeds once, then generates one batch; returns the problems added.
+        Google Sheets being unconfigured or down never stops the bank from being refilled.
+        """
+        with self.app.app_context():
+            try:
+                added = 0
+                if not self._imported:
+                    try:
+                        added += import_sheet_problems()
+                        self._imported = True
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.error(f"Importing math problems from Google Sheets failed, retrying next pass: {e}")
+                added += refill_bank(self.target_depth, self.batch_size)
+                try:
+                    push_explanations()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Pushing math explanations to Google Sheets failed, retrying next pass: {e}")
+                return added
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                added = self.run_once()
+            except Exception as e:
+                logger.error(f"Math problem bank refill failed: {e}")
+                added = 0
+            # Keep going while buckets are short, otherwise wait before checking again
+            if not added:
+                self._stop.wait(self.interval_seconds)
+
+
+def start_math_bank_refiller(app, interval_seconds, target_depth, batch_size):
+    return MathBankRefiller(app, interval_seconds, target_depth, batch_size).start()
@@ -1,8 +1,12 @@
 import random
 import json
 from flask import session
+from database.db import db
+from database.models import MathProblem
 from services.auth_service import clear_session_files
-from services.openai_service import generate_math_problem, generate_problem_explanation
+from services import openai_service
+from services.openai_service import generate_problem_explanation, is_placeholder
+from services.single_flight import SingleFlight, generation_lease, run_with_lease
 import logging
 logger = logging.getLogger(__name__)
 
@@ -36,7 +40,13 @@ MATH_CATEGORIES = {
 # Difficulty levels
 DIFFICULTY_LEVELS = ['easy', 'medium', 'hard']
 
-# Sample problems (will be replaced by OpenAI API call)
+# Explanations currently being generated by this process, by problem id
+_explanation_flights = SingleFlight()
+
+# How many served problem ids are remembered per session to avoid repeats
+MAX_SEEN_PROBLEMS = 200
+
+# Sample problems, served only while the problem bank is still empty
 SAMPLE_PROBLEMS = [
     {
         'id': 1,
@@ -90,137 +100,31 @@ def get_random_problem_params():
     }
 
 def get_next_math_problem():
-    """Fetches the next math problem with options."""
-    from config import Config
-    from services.google_sheet_service import GoogleSheetsService
-    
-    # Check if we have cached problems
-    if 'math_problems' not in session:
-        # First, try to load problems from Google Sheets
-        try:
-            service_account_file_info = Config.GOOGLE_CREDENTIALS_JSON
-            spreadsheet_id = Config.SPREADSHEET_ID
-            sheets_service = GoogleSheetsService(service_account_file_info, spreadsheet_id)
-            loaded_problems = sheets_service.load_math_problems()
-            
-            if loaded_problems:
-                logger.info(f"Loaded {len(loaded_problems)} math problems from Google Sheets")
-                session['math_problems'] = loaded_problems
-            else:
-                logger.info("No math problems found in Google Sheets, generating new ones")
-                session['math_problems'] = []
-                
-            # Always set the sheet_service in the session regardless of whether problems were loaded
-            session['sheet_service'] = {'service_account_info': service_account_file_info, 'spreadsheet_id': spreadsheet_id}
-        except Exception as e:
-            logger.error(f"Error loading math problems from Google Sheets: {e}")
-            session['math_problems'] = []
-            
-            # Even when there's an error, try to set up sheet_service if we have the required info
-            try:
-                if Config.GOOGLE_CREDENTIALS_JSON and Config.SPREADSHEET_ID:
-                    logger.info("Setting up sheet_service despite loading error")
-                    session['sheet_service'] = {
-                        'service_account_info': service_account_file_info, 
-                        'spreadsheet_id': spreadsheet_id
-                    }
-            except Exception as setup_error:
-                logger.error(f"Failed to set up sheet_service after loading error: {setup_error}")
-    
-    # If we have no problems (either no cached or no loaded), generate some
-    if not session.get('math_problems'):
-        # Generate more problems using OpenAI API
-        new_problems = []
-        
-        # Generate just 1 problem to start (to avoid timeouts)
-        # We'll generate more problems in the background later
-        params = get_random_problem_params()
-        try:
-            problem = generate_math_problem(
-                category=params['category'], 
-                topic=params['topic'], 
-                difficulty=params['difficulty']
-            )
-            if problem:
-                # Generate a unique ID for the problem
-                from uuid import uuid4
-                problem['id'] = str(uuid4())[:8]  # First 8 chars of UUID
-                new_problems.append(problem)
-                
-                # Save to Google Sheets if possible
-                if 'sheet_service' in session:
-                    try:
-                        service_info = session['sheet_service']
-                        logger.info(f"Attempting to save math problem ID {problem['id']} to Google Sheets")
-                        sheets_service = GoogleSheetsService(
-                            service_info['service_account_info'], 
-                            service_info['spreadsheet_id']
-                        )
-                        result = sheets_service.save_math_problem(problem)
-                        if result:
-                            logger.info(f"Successfully saved math problem ID {problem['id']} to Google Sheets")
-                        else:
-                            logger.warning(f"Failed to save math problem ID {problem['id']} to Google Sheets")
-                    except Exception as e:
-                        logger.error(f"Error saving problem to Google Sheets: {e}")
-                else:
-                    logger.warning("Cannot save math problem: sheet_service not in session")
-        except Exception as e:
-            logger.error(f"Error generating math problem: {e}")
-        
-        # Fall back to sample problems if API fails and we couldn't load any
-        if not new_problems:
-            new_problems = SAMPLE_PROBLEMS.copy()
-        
-        session['math_problems'] = new_problems
-        session.modified = True
-    
-    # If we're running low on problems, generate just one more (to avoid timeouts)
-    if len(session['math_problems']) < 2:
-        new_problems = []
-        params = get_random_problem_params()
-        try:
-            # Generate just 1 more problem to avoid timeouts
-            problem = generate_math_problem(
-                category=params['category'], 
-                topic=params['topic'], 
-                difficulty=params['difficulty']
-            )
-            if problem:
-                # Generate a unique ID for the problem
-                from uuid import uuid4
-                problem['id'] = str(uuid4())[:8]  # First 8 chars of UUID
-                new_problems.append(problem)
-                
-                # Save to Google Sheets if possible
-                if 'sheet_service' in session:
-                    try:
-                        service_info = session['sheet_service']
-                        logger.info(f"Attempting to save additional math problem ID {problem['id']} to Google Sheets")
-                        sheets_service = GoogleSheetsService(
-                            service_info['service_account_info'], 
-                            service_info['spreadsheet_id']
-                        )
-                        result = sheets_service.save_math_problem(problem)
-                        if result:
-                            logger.info(f"Successfully saved additional math problem ID {problem['id']} to Google Sheets")
-                        else:
-                            logger.warning(f"Failed to save additional math problem ID {problem['id']} to Google Sheets")
-                    except Exception as e:
-                        logger.error(f"Error saving additional problem to Google Sheets: {e}")
-                else:
-                    logger.warning("Cannot save additional math problem: sheet_service not in session")
-        except Exception as e:
-            logger.error(f"Error generating additional math problems: {e}")
-        
-        session['math_problems'].extend(new_problems)
-        session.modified = True
-    
-    # Pick a random problem from the list
-    problem = random.choice(session['math_problems'])
-    
-    # Remove the selected problem from the list to avoid repetition in this session
-    session['math_problems'] = [p for p in session['math_problems'] if p.get('id') != problem.get('id')]
+    """
+    Fetches the next math problem from the problem bank, skipping problems already served in this session.
+    Generation happens in the background refiller, so this never calls OpenAI.
+    """
+    seen_ids = session.get('math_seen_problem_ids', [])
+    params = get_random_problem_params()
+    problem = MathProblem.pick(exclude_ids=seen_ids, **params)
+    if problem is None:
+        # The refiller hasn't stocked this bucket yet, any unseen problem will do
+        problem = MathProblem.pick(exclude_ids=seen_ids)
+    if problem is None and seen_ids:
+        # Every banked problem has been served in this session, start over
+        logger.info("All banked math problems have been served, starting over")
+        seen_ids = []
+        problem = MathProblem.pick()
+
+    if problem is not None:
+        problem = problem.to_dict()
+    else:
+        # Fall back to sample problems until the bank has been filled
+        logger.warning("Math problem bank is empty, serving a sample problem")
+        problem = random.choice(SAMPLE_PROBLEMS).copy()
+
+    # Remember the problem to avoid repetition in this session
+    session['math_seen_problem_ids'] = (seen_ids + [str(problem['id'])])[-MAX_SEEN_PROBLEMS:]
     session.modified = True
     
     return {
@@ -228,8 +132,88 @@ def get_next_math_problem():
         'correct_answer': problem['correct_answer']
     }
 
-def check_math_answer(user_answer, problem, correct_answer):
-    """Checks the user's answer to a math problem and updates the score."""
+def get_problem_explanation(problem, correct_answer):
+    """
+    Returns the stored explanation for a problem, generating it once if there is none.
+    Generated explanations are saved on the banked problem and pushed to Google Sheets later.
+    Concurrent calls for the same problem, in this process or in other workers, share one generation.
+    """
+    problem_id = problem['id']
+    stored = MathProblem.get_explanation(problem_id)
+    if stored:
+        return stored
+
+    def generate():
+        # Another worker may have stored it while we waited for the lease
+        stored = MathProblem.get_explanation(problem_id)
+        if stored:
+            return stored
+        try:
+            explanation = generate_problem_explanation(problem['question'], correct_answer)
+        except Exception as e:
+            logger.error(f"Error generating problem explanation: {e}")
+            return "No explanation available."
+        if explanation and not is_placeholder(explanation):
+            _store_explanation(problem_id, explanation)
+        return explanation
+
+    key = _explanation_key(problem_id)
+    explanation = _explanation_flights.do(key, lambda: run_with_lease(
+        key, generate, is_done=lambda: MathProblem.get_explanation(problem_id) is not None
+    ))
+    # None means another worker generated and stored it
+    return explanation or MathProblem.get_explanation(problem_id) or "No explanation available."
+
+def stream_problem_explanation(problem, correct_answer):
+    """
+    Yields ('token', text) events while an explanation streams in, then one ('result', explanation) event.
+    A stored explanation is yielded as the result straight away; a streamed one is stored once complete.
+    Only one request streams a given problem's explanation at a time; the others wait for the stored result.
+    """
+    problem_id = problem['id']
+    stored = MathProblem.get_explanation(problem_id)
+    if stored:
+        yield 'result', stored
+        return
+
+    with generation_lease(_explanation_key(problem_id),
+                          is_done=lambda: MathProblem.get_explanation(problem_id) is not None) as leased:
+        stored = MathProblem.get_explanation(problem_id)
+        if stored or not leased:
+            yield 'result', stored or "No explanation available."
+            return
+
+        content = []
+        try:
+            for text in openai_service.stream_problem_explanation(problem['question'], correct_answer):
+                content.append(text)
+                yield 'token', text
+        except Exception as e:
+            logger.error(f"Error streaming problem explanation: {e}")
+            yield 'result', "No explanation available."
+            return
+
+        explanation = ''.join(content).strip()
+        if explanation:
+            _store_explanation(problem_id, explanation)
+    yield 'result', explanation or "No explanation available."
+
+def _explanation_key(problem_id):
+    return f"explanation:{problem_id}"
+
+def _store_explanation(problem_id, explanation):
+    try:
+        MathProblem.set_explanation(problem_id, explanation)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error storing explanation for problem {problem_id}: {e}")
+
+def check_math_answer(user_answer, problem, correct_answer, generate_explanation=True):
+    """
+    Checks the user's answer to a math problem and updates the score.
+    With generate_explanation=False a missing explanation is only looked up, not generated, so the
+    page can stream it instead.
+    """
     
     # Compare answers, with flexibility for numeric values
     is_correct = False
@@ -244,13 +228,13 @@ def check_math_answer(user_answer, problem, correct_answer):
     
     explanation = problem.get('explanation', '')
     
-    # If no explanation exists, generate one
+    # If no explanation exists, look it up by problem id or generate and store one
     if not explanation and is_correct is False:
-        try:
-            explanation = generate_problem_explanation(problem['question'], correct_answer)
-        except Exception as e:
-            logger.error(f"Error generating problem explanation: {e}")
-            explanation = "No explanation available."
+        if generate_explanation:
+            explanation = get_problem_explanation(problem, correct_answer)
+        else:
+            explanation = MathProblem.get_explanation(problem['id']) or ''
+
     
     if is_correct:
         session['math_score']['correct'] += 1
@@ -265,6 +249,7 @@ def check_math_answer(user_answer, problem, correct_answer):
         if 'incorrect_math_answers' not in session:
             session['incorrect_math_answers'] = []
         session['incorrect_math_answers'].append({
+            'problem_id': problem['id'],
             'question': problem['question'],
             'user_answer': user_answer,
             'correct_answer': correct_answer,
@@ -284,9 +269,14 @@ def get_math_summary():
     correct_answers = session.get('math_score', {}).get('correct', 0)
     incorrect_answers = session.get('math_score', {}).get('incorrect', 0)
     total_answers = correct_answers + incorrect_answers
+    incorrect_answer_details = session.get('incorrect_math_answers', [])
+    for item in incorrect_answer_details:
+        # Explanations streamed to the page after the answer was recorded are stored by problem id
+        if not item.get('explanation') and item.get('problem_id') is not None:
+            item['explanation'] = MathProblem.get_explanation(item['problem_id']) or ''
     return {
         'correct_answers': correct_answers,
         'incorrect_answers': incorrect_answers,
         'total_answers': total_answers,
-        'incorrect_answer_details': session.get('incorrect_math_answers', [])
+        'incorrect_answer_details': incorrect_answer_details
     }
\ No newline at end of file
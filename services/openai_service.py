@@ -1,17 +1,240 @@
 import openai
 import json
+import random
 import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
 from config import Config
-from openai.error import RateLimitError, OpenAIError
+from services import llm_backend
+from services.llm_metrics import LLMMetrics
+from openai.error import RateLimitError, OpenAIError, APIError, APIConnectionError, ServiceUnavailableError, Timeout, TryAgain
 import logging
 
 openai.api_key = Config.OPENAI_API_KEY
 model = "gpt-4o-mini-2024-07-18"
 
+# Errors worth retrying; anything else (bad request, auth) fails immediately
+RETRYABLE_ERRORS = (RateLimitError, APIError, APIConnectionError, ServiceUnavailableError, Timeout, TryAgain)
+
+# Fallback texts returned when the API can't be used; these must never be cached as real data
+PLACEHOLDER_PREFIXES = (
+    "Definition not available",
+    "Incorrect option not available",
+    "Similar words not available",
+    "No explanation available",
+)
+
+
+class LLMUnavailableError(OpenAIError):
+    """Raised without calling the API while the circuit breaker is open or the rate limiter is saturated."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every OpenAI call in the process."""
+
+    def __init__(self, rate_per_second, capacity):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """Take one token, waiting up to timeout seconds; returns False if none became available."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate_per_second
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and fails fast for reset_seconds.
+    Then a single trial call is let through: success closes the breaker, failure opens it again, and a
+    trial that ends any other way (a bad request, a saturated limiter) lets the next call try again.
+    """
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """Raises LLMUnavailableError while open; returns True if the caller makes the half-open trial call."""
+        with self._lock:
+            if self.state == 'closed':
+                return False
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = 'half_open'
+                return True
+            raise LLMUnavailableError(f"OpenAI circuit breaker is {self.state}, failing fast")
+
+    def end_trial(self):
+        """Called after a trial call; if it recorded neither a success nor a failure, reopen for a new trial."""
+        with self._lock:
+            if self.state == 'half_open':
+                # _opened_at is unchanged, so the next call becomes the trial straight away
+                self.state = 'open'
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logging.warning(f"Opening OpenAI circuit breaker after {self._failures} failures")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+rate_limiter = TokenBucket(Config.OPENAI_REQUESTS_PER_SECOND, Config.OPENAI_BURST)
+circuit_breaker = CircuitBreaker(Config.OPENAI_BREAKER_THRESHOLD, Config.OPENAI_BREAKER_RESET_SECONDS)
+
+# Per-thread callback charged before every API call, see call_budget()
+_call_budget = threading.local()
+
+
+@contextmanager
+def call_budget(acquire):
+    """
+    Calls acquire(estimated_tokens) before every API call this thread makes inside the block, so a caller
+    with its own requests/tokens budget is charged for fallback calls too. Tokens are estimated as the
+    prompt at four characters per token plus max_tokens.
+    """
+    previous = getattr(_call_budget, 'acquire', None)
+    _call_budget.acquire = acquire
+    try:
+        yield
+    finally:
+        _call_budget.acquire = previous
+
+
+def _charge_call_budget(kwargs):
+    acquire = getattr(_call_budget, 'acquire', None)
+    if acquire:
+        prompt_chars = sum(len(message['content']) for message in kwargs.get('messages', []))
+        acquire(prompt_chars // 4 + kwargs.get('max_tokens', 0))
+
+
+def _chat_completion(feature, **kwargs):
+    """
+    Calls the LLM backend (openai.ChatCompletion.create unless a fake is installed) through the shared
+    rate limiter and circuit breaker, and records the call's latency, token usage and outcome under feature.
+    """
+    _charge_call_budget(kwargs)
+    started = time.monotonic()
+    outcome = 'error'
+    usage = {}
+    try:
+        response = _call_with_retries(**kwargs)
+        outcome = 'success'
+        usage = response.get('usage') or {}
+        return response
+    except LLMUnavailableError:
+        # Failed fast without calling the API; the caller serves a placeholder
+        outcome = 'placeholder'
+        raise
+    except RateLimitError:
+        outcome = 'rate_limited'
+        raise
+    finally:
+        LLMMetrics.record(feature, outcome, time.monotonic() - started, kwargs.get('model'),
+                          usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0))
+
+
+def _call_with_retries(**kwargs):
+    """Retries transient errors with jittered exponential backoff, tripping the circuit breaker when they persist."""
+    kwargs.setdefault('request_timeout', Config.OPENAI_REQUEST_TIMEOUT_SECONDS)
+    trial = circuit_breaker.before_call()
+    try:
+        for attempt in range(Config.OPENAI_MAX_RETRIES + 1):
+            if not rate_limiter.acquire(Config.OPENAI_LIMITER_TIMEOUT_SECONDS):
+                raise LLMUnavailableError("OpenAI rate limiter is saturated, failing fast")
+            try:
+                response = llm_backend.create(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == Config.OPENAI_MAX_RETRIES:
+                    circuit_breaker.record_failure()
+                    raise
+                # Full jitter: sleep a random time up to the exponential backoff
+                delay = random.uniform(0, min(20.0, 0.5 * 2 ** attempt))
+                logging.warning(f"OpenAI call failed ({e.__class__.__name__}), retry {attempt + 1} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            circuit_breaker.record_success()
+            return response
+    finally:
+        if trial:
+            circuit_breaker.end_trial()
+
+
+def _stream_chat_completion(feature, **kwargs):
+    """
+    Streaming variant of _chat_completion that yields content deltas as they arrive.
+    Only opening the stream is retried; an error after the first delta is raised to the caller.
+    Streams carry no usage, so the recorded token counts are estimated at four characters per token.
+    """
+    _charge_call_budget(kwargs)
+    started = time.monotonic()
+    outcome = 'error'
+    content_chars = 0
+    try:
+        # _call_with_retries records a failure to open the stream with the circuit breaker itself
+        chunks = iter(_call_with_retries(stream=True, **kwargs))
+        try:
+            for chunk in chunks:
+                content = chunk['choices'][0].get('delta', {}).get('content')
+                if content:
+                    content_chars += len(content)
+                    yield content
+        except RETRYABLE_ERRORS:
+            circuit_breaker.record_failure()
+            raise
+        outcome = 'success'
+    except LLMUnavailableError:
+        outcome = 'placeholder'
+        raise
+    except RateLimitError:
+        outcome = 'rate_limited'
+        raise
+    finally:
+        prompt_chars = sum(len(message['content']) for message in kwargs.get('messages', []))
+        LLMMetrics.record(feature, outcome, time.monotonic() - started, kwargs.get('model'),
+                          prompt_chars // 4, content_chars // 4)
+
+def is_placeholder(value):
+    """True if value (a string, list or similar-word entry) is one of the fallback texts above."""
+    if isinstance(value, str):
+        return value.startswith(PLACEHOLDER_PREFIXES)
+    if isinstance(value, dict):
+        return is_placeholder(value.get('definition', ''))
+    if isinstance(value, (list, tuple)):
+        return any(is_placeholder(item) for item in value)
+    return False
+
 def fetch_definition(word):
     logging.info(f"Fetching definition for '{word}' from OpenAI API.")
     try:
-        response = openai.ChatCompletion.create(
+        response = _chat_completion(
+            'definition',
             model=model,
             messages=[
                 {"role": "user", "content": f"Define the word '{word}'."}
@@ -41,7 +264,8 @@ def fetch_incorrect_options(word, correct_definition, num_options=3):
         f"the style and structure of this correct definition: '{correct_definition}', but with a different meaning."
         f" Each incorrect definition should sound believable but describe the word inaccurately."
         )
-        response = openai.ChatCompletion.create(
+        response = _chat_completion(
+            'incorrect_options',
             model= model,
             messages=[
                 {"role": "user", "content": prompt}
@@ -65,40 +289,101 @@ def fetch_incorrect_options(word, correct_definition, num_options=3):
         logging.error(f"Error fetching incorrect options: {e}")
         return ["Incorrect option not available."] * num_options
 
-def fetch_similar_words(word, num_words=4):
-    logging.info(f"Fetching similar words for '{word}' from OpenAI API.")
+# How many words were generated through each path of fetch_question_material
+generation_path_counts = Counter()
+
+def fetch_question_material(word, num_options=3):
+    """
+    Fetches the definition and num_options incorrect definitions for a word in one JSON completion.
+    Falls back to fetch_definition + fetch_incorrect_options when the reply can't be validated.
+    Returns a dict with 'definition', 'incorrect_options', 'path' ('combined', 'two_step' or
+    'unavailable') and 'placeholder', which is True when the texts are fallbacks that must not be stored.
+    """
+    logging.info(f"Fetching definition and {num_options} incorrect options for '{word}' in one call.")
     try:
         prompt = (
-            f"For the word '{word}', provide {num_words} similar or related words with their brief definitions. "
-            f"Format the response exactly like this example (without numbering, just word: definition pairs):\n\n"
-            f"articulate: Able to express oneself clearly and effectively.\n"
-            f"eloquent: Fluent and persuasive in speaking or writing.\n"
-            f"coherent: Logical and consistent in thought or speech.\n"
-            f"expressive: Effectively conveying thought or feeling."
+            f"Define the word '{word}', then provide {num_options} brief, plausible, and incorrect definitions "
+            f"for it that closely resemble the style and structure of the correct definition but have a different meaning. "
+            f"Each incorrect definition should sound believable but describe the word inaccurately.\n\n"
+            f"Respond with JSON only, in exactly this structure:\n"
+            f"{{\"definition\": \"[correct definition]\", \"incorrect_options\": [{num_options} incorrect definitions as strings]}}"
         )
-        response = openai.ChatCompletion.create(
+        response = _chat_completion(
+            'question_material',
             model=model,
             messages=[
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=150,
+            max_tokens=100 + 60 * num_options,
             n=1,
             stop=None,
+            response_format={"type": "json_object"},
         )
         content = response['choices'][0]['message']['content'].strip()
-        
-        # Parse the response into word-definition pairs
-        similar_words = []
-        for line in content.split('\n'):
-            if line and ':' in line:
-                parts = line.split(':', 1)
-                if len(parts) == 2:
-                    word = parts[0].strip()
-                    definition = parts[1].strip()
-                    similar_words.append({"word": word, "definition": definition})
-        
-        return similar_words[:num_words]  # Ensure we return at most num_words
+        material = _parse_question_material(content, num_options)
+        if material:
+            definition, incorrect_options = material
+            return _record_generation_path(word, definition, incorrect_options, 'combined')
+        logging.warning(f"Combined generation for '{word}' returned invalid JSON, falling back to two calls.")
+        logging.debug(f"Raw response: {content}")
+    except (RateLimitError, LLMUnavailableError) as e:
+        # Two more calls would only pile onto a degraded API
+        logging.error(f"Rate limit exceeded or API unavailable: {e}")
+        return _record_generation_path(
+            word, "Definition not available due to API rate limit.",
+            ["Incorrect option not available due to API rate limit."] * num_options, 'unavailable'
+        )
+    except OpenAIError as e:
+        logging.error(f"OpenAI API error: {e}")
+    except Exception as e:
+        logging.error(f"Error fetching question material: {e}")
+
+    definition = fetch_definition(word)
+    incorrect_options = fetch_incorrect_options(word, definition, num_options=num_options)
+    return _record_generation_path(word, definition, incorrect_options, 'two_step')
+
+def _parse_question_material(content, num_options):
+    """Returns (definition, incorrect_options) from a combined JSON reply, or None if it is not usable."""
+    # Find JSON if it's embedded in other text
+    json_match = re.search(r'\{.*\}', content, re.DOTALL)
+    if not json_match:
+        return None
+    try:
+        data = json.loads(json_match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    definition = data.get('definition')
+    options = data.get('incorrect_options')
+    if not isinstance(definition, str) or not definition.strip() or not isinstance(options, list):
+        return None
+    definition = definition.strip()
+
+    definition_key = definition.rstrip('. ').lower()
+    incorrect_options = []
+    for option in options:
+        if not isinstance(option, str):
+            return None
+        # Drop list markers such as "1." or "-" that some replies still include
+        option = re.sub(r'^\s*(?:[-•*]|\d+[.)])\s*', '', option).strip()
+        if option and option.rstrip('. ').lower() != definition_key and option not in incorrect_options:
+            incorrect_options.append(option)
+    if len(incorrect_options) < num_options:
+        return None
+    return definition, incorrect_options[:num_options]
+
+def _record_generation_path(word, definition, incorrect_options, path):
+    generation_path_counts[path] += 1
+    logging.info(f"Generated question material for '{word}' via the {path} path.")
+    return {'definition': definition, 'incorrect_options': incorrect_options, 'path': path,
+            'placeholder': is_placeholder(definition) or is_placeholder(incorrect_options)}
+
+def fetch_similar_words(word, num_words=4):
+    try:
+        return request_similar_words(word, num_words=num_words)
     except RateLimitError as e:
         logging.error(f"Rate limit exceeded: {e}")
         return [{"word": "Not available", "definition": "Similar words not available due to API rate limit."}]
@@ -108,6 +393,47 @@ def fetch_similar_words(word, num_words=4):
     except Exception as e:
         logging.error(f"Error fetching similar words: {e}")
         return [{"word": "Not available", "definition": "Similar words not available."}]
+
+def _similar_words_prompt(word, num_words):
+    return (
+        f"For the word '{word}', provide {num_words} similar or related words with their brief definitions. "
+        f"Format the response exactly like this example (without numbering, just word: definition pairs):\n\n"
+        f"articulate: Able to express oneself clearly and effectively.\n"
+        f"eloquent: Fluent and persuasive in speaking or writing.\n"
+        f"coherent: Logical and consistent in thought or speech.\n"
+        f"expressive: Effectively conveying thought or feeling."
+    )
+
+def request_similar_words(word, num_words=4):
+    """Like fetch_similar_words, but raises on API errors instead of returning placeholder entries."""
+    logging.info(f"Fetching similar words for '{word}' from OpenAI API.")
+    prompt = _similar_words_prompt(word, num_words)
+    response = _chat_completion(
+        'similar_words',
+        model=model,
+        messages=[
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=150,
+        n=1,
+        stop=None,
+    )
+    content = response['choices'][0]['message']['content'].strip()
+    return parse_similar_words(content, num_words)
+
+def parse_similar_words(content, num_words=4):
+    """Parses 'word: definition' lines into at most num_words similar-word entries."""
+    similar_words = []
+    for line in content.split('\n'):
+        if line and ':' in line:
+            parts = line.split(':', 1)
+            if len(parts) == 2:
+                similar_word = parts[0].strip()
+                definition = parts[1].strip()
+                similar_words.append({"word": similar_word, "definition": definition})
+
+    return similar_words[:num_words]  # Ensure we return at most num_words
         
 def generate_math_problem(category, topic, difficulty):
     """Generates a math word problem based on specified parameters."""
@@ -128,7 +454,8 @@ def generate_math_problem(category, topic, difficulty):
             f"Ensure the explanation is clear and educational, explaining each step of the solution process."
         )
         
-        response = openai.ChatCompletion.create(
+        response = _chat_completion(
+            'math_problem',
             model=model,
             messages=[
                 {"role": "user", "content": prompt}
@@ -174,19 +501,23 @@ def generate_math_problem(category, topic, difficulty):
         logging.error(f"Error generating math problem: {e}")
         return None
 
+def _explanation_prompt(question, answer):
+    return (
+        f"Provide a clear, step-by-step explanation for solving this math word problem:\n\n"
+        f"Problem: {question}\n"
+        f"Answer: {answer}\n\n"
+        f"Your explanation should be suitable for a 10-12 year old child preparing for grammar school (GL level) exams. "
+        f"Break down the problem-solving process into logical steps that a child can follow."
+    )
+
 def generate_problem_explanation(question, answer):
     """Generates an explanation for a math problem if one doesn't exist."""
     logging.info(f"Generating explanation for problem")
     try:
-        prompt = (
-            f"Provide a clear, step-by-step explanation for solving this math word problem:\n\n"
-            f"Problem: {question}\n"
-            f"Answer: {answer}\n\n"
-            f"Your explanation should be suitable for a 10-12 year old child preparing for grammar school (GL level) exams. "
-            f"Break down the problem-solving process into logical steps that a child can follow."
-        )
+        prompt = _explanation_prompt(question, answer)
         
-        response = openai.ChatCompletion.create(
+        response = _chat_completion(
+            'explanation',
             model=model,
             messages=[
                 {"role": "user", "content": prompt}
@@ -203,3 +534,33 @@ def generate_problem_explanation(question, answer):
     except Exception as e:
         logging.error(f"Error generating problem explanation: {e}")
         return "No explanation available."
+
+def stream_similar_words(word, num_words=4):
+    """Yields the similar-words completion text as it streams in; parse the joined text with parse_similar_words."""
+    logging.info(f"Streaming similar words for '{word}' from OpenAI API.")
+    return _stream_chat_completion(
+        'similar_words_stream',
+        model=model,
+        messages=[
+            {"role": "user", "content": _similar_words_prompt(word, num_words)}
+        ],
+        temperature=0.7,
+        max_tokens=150,
+        n=1,
+        stop=None,
+    )
+
+def stream_problem_explanation(question, answer):
+    """Yields a math problem explanation as it streams in."""
+    logging.info("Streaming explanation for problem")
+    return _stream_chat_completion(
+        'explanation_stream',
+        model=model,
+        messages=[
+            {"role": "user", "content": _explanation_prompt(question, answer)}
+        ],
+        temperature=0.5,
+        max_tokens=300,
+        n=1,
+        stop=None,
+    )
@@ -0,0 +1,71 @@
+import json
+from typing import NamedTuple, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config import Config
+from database.db import db
+from database.models import WordData
+from services.lru_cache import LRUCache
+import logging
+logger = logging.getLogger(__name__)
+
+
+class QuestionRecord(NamedTuple):
+    """Immutable question material for one word, with the distractors already parsed."""
+    word: str
+    definition: str
+    incorrect_options: Tuple[str, ...]
+
+
+_records = LRUCache(maxsize=Config.QUESTION_RECORD_CACHE_SIZE, ttl_seconds=Config.QUESTION_RECORD_CACHE_TTL_SECONDS)
+
+
+def get_question_record(word) -> Optional[QuestionRecord]:
+    """
+    Returns the question record for a word, or None if it has no word_data row yet.
+    A cached word costs no queries; a miss costs one primary-key lookup.
+    """
+    word = word.strip()
+    record = _records.get(word)
+    if record is not None:
+        return record
+    row = db.session.get(WordData, word)
+    if row is None:
+        return None
+    record = to_question_record(row)
+    _records.set(word, record)
+    return record
+
+
+def to_question_record(row) -> QuestionRecord:
+    options = row.incorrect_options
+    # Rows store the options list JSON-encoded a second time inside the JSON column
+    if isinstance(options, str):
+        options = json.loads(options)
+    return QuestionRecord(row.word, row.definition, tuple(options))
+
+
+def invalidate_question_record(word=None):
+    """Evicts one word, or every record when word is None."""
+    if word is None:
+        _records.clear()
+    else:
+        _records.invalidate(word.strip())
+
+
+def question_record_stats() -> dict:
+    return _records.stats()
+
+
+@event.listens_for(WordData, 'after_update')
+@event.listens_for(WordData, 'after_delete')
+def _evict_changed_row(mapper, connection, target):
+    invalidate_question_record(target.word)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _evict_on_bulk_change(orm_execute_state):
+    # query.update() / query.delete() bypass the per-row events above
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        if orm_execute_state.bind_mapper.class_ is WordData:
+            invalidate_question_record()
@@ -0,0 +1,152 @@
+import threading
+from collections import Counter
+from config import Config
+from database.models import SimilarWords
+from services.lru_cache import LRUCache
+from services.single_flight import SingleFlight
+from services import openai_service
+from services.openai_service import request_similar_words, LLMUnavailableError
+from openai.error import RateLimitError
+import logging
+logger = logging.getLogger(__name__)
+
+# Bump when the similar-words prompt or format changes so older cached entries are ignored
+SIMILAR_WORDS_CACHE_VERSION = 1
+
+UNAVAILABLE = [{"word": "Not available", "definition": "Similar words not available."}]
+
+# Per-process LRU in front of the similar_words table; entries hold (status, similar_words)
+_memory_cache = LRUCache(maxsize=Config.SIMILAR_WORDS_LRU_SIZE)
+_stats = Counter()
+_flights = SingleFlight()
+_stats_lock = threading.Lock()
+
+
+def normalize_word(word):
+    return str(word).strip().lower()
+
+
+def _count(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def get_similar_words(word, num_words=4):
+    """
+    Returns similar words for a word from the per-process LRU, then the database, and only
+    calls OpenAI on a miss. Failures are cached briefly so a failing word isn't retried on every click.
+    """
+    key = normalize_word(word)
+    entry = _cached_entry(key)
+    if entry is None:
+        _count('misses')
+        # Concurrent misses for the same word share one OpenAI call
+        entry = _flights.do(key, lambda: _cached_entry(key) or _fetch_and_store(key, word, num_words))
+    return _entry_result(entry, num_words)
+
+
+def stream_similar_words(word, num_words=4):
+    """
+    Like get_similar_words, but yields ('token', text) events while a completion streams in, followed by
+    one ('result', similar_words) event. Cached results are yielded as the result straight away.
+    The finished completion is cached like a blocking lookup.
+    """
+    key = normalize_word(word)
+    entry = _cached_entry(key)
+    if entry is None:
+        _count('misses')
+        content = []
+        try:
+            for text in openai_service.stream_similar_words(word, num_words=num_words):
+                content.append(text)
+                yield 'token', text
+            similar_words = openai_service.parse_similar_words(''.join(content), num_words)
+        except (RateLimitError, LLMUnavailableError) as e:
+            logger.warning(f"Similar words for '{word}' unavailable: {e}")
+            _count('failures')
+            yield 'result', list(UNAVAILABLE)
+            return
+        except Exception as e:
+            logger.error(f"Error streaming similar words for '{word}': {e}")
+            similar_words = []
+        if not similar_words:
+            _count('failures')
+        store_similar_words(word, similar_words)
+        entry = ('ok', similar_words) if similar_words else ('failed', None)
+    yield 'result', _entry_result(entry, num_words)
+
+
+def _cached_entry(key):
+    """The (status, similar_words) entry from the LRU or the database, or None on a miss."""
+    entry = _memory_cache.get(key)
+    if entry is not None:
+        _count('memory_hits')
+    else:
+        stored = SimilarWords.lookup(key, SIMILAR_WORDS_CACHE_VERSION)
+        if stored is None:
+            return None
+        _count('db_hits')
+        entry = (stored.status, stored.similar_words)
+        _memory_cache.set(key, entry, ttl_seconds=_seconds_left(stored))
+    if entry[0] != 'ok':
+        # Only failures served from the cache are negative hits, not ones that just happened
+        _count('negative_hits')
+    return entry
+
+
+def _entry_result(entry, num_words):
+    status, similar_words = entry
+    if status != 'ok':
+        return list(UNAVAILABLE)
+    return similar_words[:num_words]
+
+
+def store_similar_words(word, similar_words):
+    """Caches a similar-words result produced elsewhere, e.g. by a streamed completion; an empty result is cached as a failure."""
+    key = normalize_word(word)
+    if similar_words:
+        _store(key, 'ok', similar_words, Config.SIMILAR_WORDS_TTL_DAYS * 86400)
+    else:
+        _store(key, 'failed', None, Config.SIMILAR_WORDS_FAILURE_TTL_SECONDS)
+
+
+def _fetch_and_store(key, word, num_words):
+    try:
+        similar_words = request_similar_words(word, num_words=num_words)
+    except (RateLimitError, LLMUnavailableError) as e:
+        # Throttling says nothing about the word itself, so don't cache a failure for it
+        logger.warning(f"Similar words for '{word}' unavailable: {e}")
+        _count('failures')
+        return ('failed', None)
+    except Exception as e:
+        logger.error(f"Error fetching similar words for '{word}': {e}")
+        similar_words = []
+
+    if similar_words:
+        entry = ('ok', similar_words)
+        _store(key, *entry, ttl_seconds=Config.SIMILAR_WORDS_TTL_DAYS * 86400)
+    else:
+        _count('failures')
+        entry = ('failed', None)
+        _store(key, *entry, ttl_seconds=Config.SIMILAR_WORDS_FAILURE_TTL_SECONDS)
+    return entry
+
+
+def _store(key, status, similar_words, ttl_seconds):
+    _memory_cache.set(key, (status, similar_words), ttl_seconds=ttl_seconds)
+    SimilarWords.store(key, similar_words, status, SIMILAR_WORDS_CACHE_VERSION, ttl_seconds)
+
+
+def _seconds_left(stored):
+    from datetime import datetime
+    return max(0.0, (stored.expires_at - datetime.now()).total_seconds())
+
+
+def get_similar_words_stats() -> dict:
+    """Hit and miss counts for the similar-words cache in this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    for event in ('memory_hits', 'db_hits', 'misses', 'failures', 'negative_hits'):
+        stats.setdefault(event, 0)
+    stats['lru'] = _memory_cache.stats()
+    return stats
@@ -0,0 +1,92 @@
+import threading
+import time
+from contextlib import contextmanager
+from config import Config
+from database.db import db
+from database.models import GenerationLease
+import logging
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key within this process: the first caller runs the
+    function and every caller that arrives while it is running gets the same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+@contextmanager
+def generation_lease(key, is_done=None, wait=True):
+    """
+    Holds the database lease for key while the block runs, so only one worker process generates it.
+    Yields True when the caller should generate, or False when it shouldn't: with wait=False the lease was
+    taken, otherwise is_done() reported that the holder has stored its result. While another process holds
+    the lease, polls until one of those happens or the lease frees up. Gives up waiting after
+    GENERATION_WAIT_SECONDS and yields True anyway. Unlike run_with_lease, the block may yield (e.g. stream).
+    """
+    deadline = time.monotonic() + Config.GENERATION_WAIT_SECONDS
+    while True:
+        owner = GenerationLease.acquire(key, Config.GENERATION_LEASE_SECONDS)
+        if owner:
+            break
+        if not wait or (is_done and is_done()):
+            yield False
+            return
+        if time.monotonic() >= deadline:
+            logger.warning(f"Timed out waiting for generation lease '{key}', generating anyway")
+            break
+        time.sleep(0.2)
+    try:
+        yield True
+    finally:
+        if owner:
+            try:
+                GenerationLease.release(key, owner)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to release generation lease '{key}': {e}")
+
+
+def run_with_lease(key, fn, is_done=None, wait=True):
+    """
+    Runs fn while holding the database lease for key, so only one worker process generates it.
+    If another process holds the lease, polls until is_done() reports its result is stored (and returns
+    None), or the lease frees up. With wait=False returns None straight away instead of polling.
+    Gives up waiting after GENERATION_WAIT_SECONDS and runs fn anyway.
+    """
+    with generation_lease(key, is_done, wait) as leased:
+        return fn() if leased else None
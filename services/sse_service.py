@@ -0,0 +1,24 @@
+import json
+from flask import Response, stream_with_context
+
+
+def format_event(event, data) -> str:
+    """One Server-Sent Events message with a JSON-encoded payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def event_stream_response(events) -> Response:
+    """
+    Streams (event, data) pairs from a generator to the browser as text/event-stream.
+    The generator runs inside the request context, so it can use the session and the database.
+    """
+    def generate():
+        for event, data in events:
+            yield format_event(event, data)
+        yield format_event('done', None)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop proxies such as nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
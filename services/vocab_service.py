@@ -1,11 +1,13 @@
 from difflib import SequenceMatcher
-import json
 import random
 import re
 from flask import session
-from database.models import WordCount, WordData
+from database.models import WordCount, WordData, SheetSyncState, Vocabulary
 from services.auth_service import clear_session_files
-from services.openai_service import fetch_definition, fetch_incorrect_options, fetch_similar_words
+from services.enrichment_service import enrich_word
+from services.openai_service import is_placeholder
+from services.question_records import get_question_record
+from services.similar_words_service import get_similar_words
 import logging
 logger = logging.getLogger(__name__)
 
@@ -16,51 +18,73 @@ def reset_score():
     session['score'] = {'correct': 0, 'incorrect': 0}
     session.modified = True
 
+def init_sheet_sync(app):
+    """Record what the write-behind buffer has written to Google Sheets so unchanged words are skipped."""
+    from services.google_sheet_service import VocabularyWriteBuffer
+
+    def record_synced(entries):
+        with app.app_context():
+            SheetSyncState.mark_synced(entries)
+            Vocabulary.clear_push([word for word, _, _ in entries])
+
+    VocabularyWriteBuffer.add_flush_listener(record_synced)
+
+def queue_sheet_write(word, definition):
+    """
+    Queues a Google Sheets upsert unless this word and definition are already synced or a placeholder.
+    The vocabulary row is flagged first so the sync job retries the write if the buffer loses it.
+    """
+    from services.google_sheet_service import VocabularyWriteBuffer
+    if is_placeholder(definition):
+        # Served while the API was degraded; never let it overwrite the real definition
+        logger.warning(f"Not writing placeholder definition for '{word}' to Google Sheets")
+        return False
+    if SheetSyncState.is_synced(word, definition):
+        logger.debug(f"Word '{word}' is already synced to Google Sheets, skipping write")
+        return False
+    Vocabulary.mark_for_push(word, definition)
+    return VocabularyWriteBuffer.add(word, definition)
+
 def get_next_question(unlearned_words):
     """Fetches the next question with options."""
-    from config import Config
-    from services.google_sheet_service import GoogleSheetsService
-    
     word = random.choice(unlearned_words)
     # hardcoding the word for testing
     # word = "defunct"
     
-    # Check if we have Google Sheets service info in the session
-    if 'sheet_service' not in session:
-        service_account_file_info = Config.GOOGLE_CREDENTIALS_JSON
-        spreadsheet_id = Config.SPREADSHEET_ID
-        session['sheet_service'] = {'service_account_info': service_account_file_info, 'spreadsheet_id': spreadsheet_id}
-    
-    # if the word is available in the DB, fetch the definition & incorrect options from the DB
-    if not WordData.word_exists(word):
-        correct_answer = fetch_definition(word)
-        incorrect_options = fetch_incorrect_options(word, correct_answer, num_options=3)
-        word_data = WordData(word=word, definition=correct_answer, incorrect_options=json.dumps(incorrect_options))
-        word_data.add_word_data()
+    # if the word is available in the DB, fetch the definition & incorrect options from the DB,
+    # otherwise generate them inline (the background enrichment worker hasn't reached it yet)
+    record = get_question_record(word)
+    material = None if record else enrich_word(word, num_options=3)
+    if record is None and material is None:
+        # Another worker stored the word while this request waited for its generation lease
+        record = get_question_record(word)
+    if material and material.get('placeholder'):
+        # The API is degraded: prefer another word that already has stored material
+        fallback = WordData.get_enriched_words([w for w in unlearned_words if w != word])
+        if fallback:
+            logger.warning(f"Question material for '{word}' unavailable, serving a stored word instead")
+            return get_next_question(fallback)
+        correct_answer = material['definition']
+        incorrect_options = material['incorrect_options']
+        logger.warning(f"Serving placeholder question for '{word}'; it is not stored or written to Google Sheets")
+    elif material:
+        correct_answer = material['definition']
+        incorrect_options = material['incorrect_options']
+        logger.info(f"Generated question for '{word}' via the {material['path']} path")
         
-        # Also save to Google Sheets
+        # Also save to Google Sheets (written in the background by the write-behind buffer)
         try:
-            service_info = session['sheet_service']
-            sheets_service = GoogleSheetsService(
-                service_info['service_account_info'], 
-                service_info['spreadsheet_id']
-            )
-            sheets_service.save_vocabulary_word(word, correct_answer)
+            queue_sheet_write(word, correct_answer)
         except Exception as e:
             logger.error(f"Error saving vocabulary word to Google Sheets: {e}")
     else:
         logger.info(f"Word '{word}' already exists in the database.")
-        correct_answer = WordData.get_correct_answer(word)
-        incorrect_options = json.loads(WordData.get_incorrect_options(word))  # Ensure incorrect_options is parsed as a list
+        correct_answer = record.definition
+        incorrect_options = list(record.incorrect_options)
         
-        # Still save to Google Sheets to ensure it's there
+        # Still save to Google Sheets to ensure it's there (skipped when already synced)
         try:
-            service_info = session['sheet_service']
-            sheets_service = GoogleSheetsService(
-                service_info['service_account_info'], 
-                service_info['spreadsheet_id']
-            )
-            sheets_service.save_vocabulary_word(word, correct_answer)
+            queue_sheet_write(word, correct_answer)
         except Exception as e:
             logger.error(f"Error saving vocabulary word to Google Sheets: {e}")
 
@@ -83,9 +107,9 @@ def text_similarity(a, b):
 
 def check_answer(user_answer, word, correct_answer, threshold=0.9):
     """Checks the user's answer and updates the score."""
-    from config import Config
-    from services.google_sheet_service import GoogleSheetsService
-    
+    # Keep the definition as stored so the Google Sheets dirty check sees unchanged content
+    definition = correct_answer.strip()
+
     # trim and convert to lowercase for case-insensitive comparison
     user_answer = user_answer.strip().lower()
     correct_answer = correct_answer.strip().lower()
@@ -101,20 +125,9 @@ def check_answer(user_answer, word, correct_answer, threshold=0.9):
     
     # Save the word to Google Sheets regardless of answer correctness
     try:
-        # Check if we have Google Sheets service info in the session
-        if 'sheet_service' not in session:
-            service_account_file_info = Config.GOOGLE_CREDENTIALS_JSON
-            spreadsheet_id = Config.SPREADSHEET_ID
-            session['sheet_service'] = {'service_account_info': service_account_file_info, 'spreadsheet_id': spreadsheet_id}
-        
         # Save word to Google Sheets
-        service_info = session['sheet_service']
-        sheets_service = GoogleSheetsService(
-            service_info['service_account_info'], 
-            service_info['spreadsheet_id']
-        )
-        sheets_service.save_vocabulary_word(word, correct_answer)
-        logger.info(f"Saved word '{word}' to Google Sheets after answer check")
+        if queue_sheet_write(word, definition):
+            logger.info(f"Queued word '{word}' for Google Sheets after answer check")
     except Exception as e:
         logger.error(f"Error saving vocabulary word to Google Sheets: {e}")
     
@@ -129,7 +142,7 @@ def check_answer(user_answer, word, correct_answer, threshold=0.9):
         # Increment word count
         WordCount.increment_word_count(word)
         # Fetch similar words
-        similar_words = fetch_similar_words(word, num_words=4)
+        similar_words = get_similar_words(word, num_words=4)
     else:
         session['score']['incorrect'] += 1
         result_message = f"Incorrect. The correct meaning of '{word}' is '{correct_answer}'."
@@ -0,0 +1,106 @@
+import threading
+import time
+from datetime import datetime
+from database.db import db
+from database.models import Vocabulary, SheetSyncState
+from services.google_sheet_service import GoogleSheetsService, invalidate_word_cache
+import logging
+logger = logging.getLogger(__name__)
+
+
+def sync_vocabulary(batch_size=500) -> dict:
+    """
+    Reconciles the Vocabulary worksheet with the local vocabulary table in both directions.
+    Words and definitions only found in the sheet are pulled into the database; words that
+    are flagged for push or missing from the sheet are written back, batch_size rows at a time.
+    """
+    sheets_service = GoogleSheetsService.from_config()
+    sheet_rows = sheets_service.load_vocabulary_rows()
+    logger.info(f"Loaded {len(sheet_rows)} words from the Vocabulary worksheet")
+
+    pulled, updated = _pull_from_sheet(sheet_rows, batch_size)
+    pushed = _push_to_sheet(sheets_service, {word.lower() for word, _ in sheet_rows}, batch_size)
+    # The cached sheet word list may be missing words added on either side, reload it on the next read
+    invalidate_word_cache()
+
+    stats = {'sheet_words': len(sheet_rows), 'pulled': pulled, 'updated': updated, 'pushed': pushed}
+    logger.info(f"Vocabulary sync finished: {stats}")
+    return stats
+
+
+def _pull_from_sheet(sheet_rows, batch_size):
+    existing = {row.word.lower(): row for row in Vocabulary.query.all()}
+    pulled = 0
+    updated = 0
+    pending = 0
+    # Pulled definitions are already in the sheet, so record them as synced to skip writing them back
+    synced = []
+    for word, definition in sheet_rows:
+        row = existing.get(word.lower())
+        if row is None:
+            row = Vocabulary(word=word, definition=definition or None)
+            db.session.add(row)
+            existing[word.lower()] = row
+            pulled += 1
+            pending += 1
+            if definition:
+                synced.append((word, definition, None))
+        elif definition and not row.definition and not row.needs_push:
+            # Fill in definitions added directly in the sheet, never overwrite unpushed local edits
+            row.definition = definition
+            updated += 1
+            pending += 1
+            synced.append((word, definition, None))
+
+        if pending >= batch_size:
+            SheetSyncState.mark_synced(synced, commit=False)
+            db.session.commit()
+            pending = 0
+            synced = []
+    SheetSyncState.mark_synced(synced, commit=False)
+    db.session.commit()
+    return pulled, updated
+
+
+def _push_to_sheet(sheets_service, sheet_words, batch_size):
+    # Rows without a definition have nothing worth writing to the sheet
+    rows = [
+        row for row in Vocabulary.query.all()
+        if row.definition and (row.needs_push or row.word.lower() not in sheet_words)
+    ]
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    pushed = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        entries = [(row.word, row.definition or '', timestamp) for row in batch]
+        # Rows whose content is already in the sheet only need their flag cleared
+        to_write = [
+            entry for entry, row in zip(entries, batch)
+            if row.word.lower() not in sheet_words or not SheetSyncState.is_synced(entry[0], entry[1])
+        ]
+        if to_write:
+            sheets_service.save_vocabulary_words(to_write)
+            SheetSyncState.mark_synced([entry for entry in to_write if entry[1]])
+            pushed += len(to_write)
+        Vocabulary.clear_push([row.word for row in batch])
+    return pushed
+
+
+def start_vocabulary_sync(app, interval_seconds):
+    """Runs sync_vocabulary every interval_seconds on a daemon thread, starting immediately."""
+    def run():
+        while True:
+            with app.app_context():
+                try:
+                    sync_vocabulary()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Vocabulary sync failed: {e}")
+                finally:
+                    db.session.remove()
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=run, name="vocab-sync", daemon=True)
+    thread.start()
+    logger.info(f"Started background vocabulary sync every {interval_seconds} seconds")
+    return thread
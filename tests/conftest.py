@@ -0,0 +1,166 @@
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its configuration at import time, so point it at throwaway storage first
+_tmp_dir = tempfile.mkdtemp(prefix='loki-vocab-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmp_dir, 'test.db')
+os.environ['SESSION_FILE_DIR'] = os.path.join(_tmp_dir, 'flask_session')
+os.environ['GOOGLE_CREDENTIALS_JSON'] = '{}'
+os.environ['SPREADSHEET_ID'] = 'test-sheet'
+os.environ['OPENAI_API_KEY'] = 'test-key'
+# Background refreshes and flushes are driven explicitly by the tests
+os.environ['WORD_CACHE_TTL_SECONDS'] = '3600'
+os.environ['SHEETS_FLUSH_INTERVAL_SECONDS'] = '3600'
+os.environ['SHEETS_FLUSH_BATCH_SIZE'] = '100000'
+os.environ['MATH_SYNC_INTERVAL_SECONDS'] = '3600'
+os.environ['ENRICHMENT_INTERVAL_SECONDS'] = '0'
+os.environ['MATH_BANK_REFILL_INTERVAL_SECONDS'] = '0'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fake_sheets import FakeSheetsClient  # noqa: E402
+
+TEST_WORDS = {
+    'abate': 'To become less intense or widespread.',
+    'abhor': 'To regard with disgust and hatred.',
+    'acumen': 'The ability to make good judgments and quick decisions.',
+    'benevolent': 'Well meaning and kindly.',
+    'candid': 'Truthful and straightforward; frank.',
+    'diligent': 'Having or showing care in one\'s work or duties.',
+    'eloquent': 'Fluent or persuasive in speaking or writing.',
+    'frugal': 'Sparing or economical with regard to money or food.',
+    'gregarious': 'Fond of company; sociable.',
+    'hapless': 'Unfortunate.',
+    'impetuous': 'Acting or done quickly and without thought or care.',
+    'jovial': 'Cheerful and friendly.',
+}
+
+TEST_PROBLEMS = [
+    [str(i), f'What is {i} + {i}?', str(i + i), 'Number', 'Mental math', 'easy', f'{i} + {i} = {i + i}', '2024-01-01 00:00:00']
+    for i in range(1, 31)
+]
+
+
+@pytest.fixture(scope='session')
+def app():
+    import app as app_module
+    app_module.app.config['TESTING'] = True
+    return app_module.app
+
+
+@pytest.fixture
+def fake_sheets():
+    """A fresh in-memory spreadsheet wired into the shared Sheets client registry."""
+    from services.google_sheet_service import (
+        SheetsClientRegistry, SheetRowIndex, MathProblemMirror, VocabularyWriteBuffer, WordListCache
+    )
+    client = FakeSheetsClient()
+    spreadsheet = client.add_spreadsheet('test-sheet')
+    spreadsheet.add_rows('Vocabulary', [['Word', 'Definition', 'Last Updated']] +
+                         [[word, definition, ''] for word, definition in TEST_WORDS.items()])
+    spreadsheet.add_rows('MathProblems', [['ID', 'Question', 'Answer', 'Category', 'Topic', 'Difficulty', 'Explanation', 'Created']] +
+                         TEST_PROBLEMS)
+
+    VocabularyWriteBuffer.flush()
+    SheetsClientRegistry.set_client_factory(lambda service_account_info: client)
+    WordListCache.invalidate()
+    SheetRowIndex.invalidate()
+    MathProblemMirror.reset()
+    yield client
+    VocabularyWriteBuffer.flush()
+    SheetsClientRegistry.set_client_factory(None)
+
+
+@pytest.fixture
+def offline_llm(monkeypatch):
+    """Replace the OpenAI-backed helpers used by the services with canned, counted answers."""
+    import services.vocab_service as vocab_service
+    import services.enrichment_service as enrichment_service
+    import services.math_service as math_service
+    import services.math_bank_service as math_bank_service
+    import services.openai_service as openai_service
+    calls = []
+
+    def fake_question_material(word, num_options=3):
+        calls.append('question_material')
+        return {'definition': f'Definition of {word}.',
+                'incorrect_options': [f'Wrong meaning {i} of {word}.' for i in range(num_options)],
+                'path': 'combined'}
+
+    def fake_similar_words(word, num_words=4):
+        calls.append('similar_words')
+        return [{'word': f'{word}-{i}', 'definition': f'Related to {word}.'} for i in range(num_words)]
+
+    def fake_math_problem(category, topic, difficulty):
+        calls.append('math_problem')
+        return {'question': f'A {difficulty} {topic} question', 'correct_answer': 42, 'category': category,
+                'topic': topic, 'difficulty': difficulty, 'explanation': 'Because 6 x 7 = 42.'}
+
+    def fake_explanation(question, answer):
+        calls.append('explanation')
+        return f'The answer is {answer}.'
+
+    def fake_stream_similar_words(word, num_words=4):
+        calls.append('similar_words_stream')
+        for i in range(num_words):
+            yield f'{word}-{i}: '
+            yield f'Related to {word}.\n'
+
+    def fake_stream_explanation(question, answer):
+        calls.append('explanation_stream')
+        yield 'The answer '
+        yield f'is {answer}.'
+
+    monkeypatch.setattr(enrichment_service, 'fetch_question_material', fake_question_material)
+    monkeypatch.setattr(openai_service, 'stream_similar_words', fake_stream_similar_words)
+    monkeypatch.setattr(openai_service, 'stream_problem_explanation', fake_stream_explanation)
+    monkeypatch.setattr(vocab_service, 'get_similar_words', fake_similar_words)
+    monkeypatch.setattr(math_bank_service, 'generate_math_problem', fake_math_problem)
+    monkeypatch.setattr(math_service, 'generate_problem_explanation', fake_explanation)
+    monkeypatch.setattr(math_bank_service, 'generate_problem_explanation', fake_explanation)
+    return calls
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """The deterministic local LLM installed as the backend, with limits that never throttle it."""
+    from services import llm_backend, openai_service, similar_words_service
+    from services.llm_backend import FakeLLM
+    fake = FakeLLM()
+    llm_backend.set_backend(fake)
+    monkeypatch.setattr(openai_service, 'rate_limiter', openai_service.TokenBucket(10000, 10000))
+    monkeypatch.setattr(openai_service, 'circuit_breaker', openai_service.CircuitBreaker(1000, 60))
+    similar_words_service._memory_cache.clear()
+    yield fake
+    llm_backend.set_backend(None)
+
+
+@pytest.fixture
+def database(app):
+    """An empty schema with every test word synced to the vocabulary table and enriched in word_data."""
+    from database.db import db
+    from database.models import WordData, Vocabulary
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for word, definition in TEST_WORDS.items():
+            options = [f'Not the meaning of {word} ({i}).' for i in range(3)]
+            db.session.add(WordData(word=word, definition=definition, incorrect_options=json.dumps(options)))
+            db.session.add(Vocabulary(word=word, definition=definition))
+        db.session.commit()
+    yield db
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app, database, fake_sheets, offline_llm):
+    """A test client logged in as a quiz user."""
+    test_client = app.test_client()
+    response = test_client.post('/login', data={'username': 'loke', 'password': 'latha'})
+    assert response.status_code == 302
+    return test_client
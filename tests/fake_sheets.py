@@ -0,0 +1,166 @@
+"""
+In-memory stand-in for the parts of gspread used by GoogleSheetsService.
+Every API call is counted and can be slowed down with injected latency, so tests
+and benchmarks can measure Google Sheets round trips without touching Google.
+"""
+import re
+import threading
+import time
+from collections import Counter
+import gspread
+
+
+class FakeSheetsClient:
+    """Fake gspread client holding any number of in-memory spreadsheets."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.spreadsheets = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reset_calls(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def add_spreadsheet(self, spreadsheet_id):
+        spreadsheet = FakeSpreadsheet(self, spreadsheet_id)
+        self.spreadsheets[spreadsheet_id] = spreadsheet
+        return spreadsheet
+
+    def open_by_key(self, spreadsheet_id):
+        self._record('open_by_key')
+        if spreadsheet_id not in self.spreadsheets:
+            self.add_spreadsheet(spreadsheet_id)
+        return self.spreadsheets[spreadsheet_id]
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, spreadsheet_id):
+        self.client = client
+        self.id = spreadsheet_id
+        self.worksheets = {}
+
+    def add_rows(self, title, rows):
+        """Create or fill a worksheet directly, without counting API calls."""
+        worksheet = self.worksheets.setdefault(title, FakeWorksheet(self.client, title))
+        worksheet.rows.extend([list(row) for row in rows])
+        return worksheet
+
+    def worksheet(self, title):
+        self.client._record('worksheet')
+        if title not in self.worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.worksheets[title]
+
+    def add_worksheet(self, title, rows=1000, cols=26):
+        self.client._record('add_worksheet')
+        self.worksheets[title] = FakeWorksheet(self.client, title)
+        return self.worksheets[title]
+
+
+def _parse_a1(range_name):
+    """Split 'B3:C3', 'A5:H' or 'G7' into (first_row, first_col, last_row, last_col); None means open-ended."""
+    cells = []
+    for part in range_name.split('!')[-1].split(':'):
+        match = re.fullmatch(r'([A-Z]*)(\d*)', part)
+        letters, digits = match.groups()
+        col = 0
+        for letter in letters:
+            col = col * 26 + ord(letter) - ord('A') + 1
+        cells.append((int(digits) if digits else None, col or None))
+    if len(cells) == 1:
+        cells.append(cells[0])
+    (first_row, first_col), (last_row, last_col) = cells
+    return first_row or 1, first_col or 1, last_row, last_col
+
+
+class FakeWorksheet:
+    def __init__(self, client, title):
+        self.client = client
+        self.title = title
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def _set_cell(self, row, col, value):
+        while len(self.rows) < row:
+            self.rows.append([])
+        cells = self.rows[row - 1]
+        while len(cells) < col:
+            cells.append('')
+        cells[col - 1] = value
+
+    def _write_range(self, range_name, values):
+        first_row, first_col, _, _ = _parse_a1(range_name)
+        for r, row_values in enumerate(values):
+            for c, value in enumerate(row_values):
+                self._set_cell(first_row + r, first_col + c, str(value))
+
+    def _append(self, rows):
+        first_row = len(self.rows) + 1
+        self.rows.extend([[str(value) for value in row] for row in rows])
+        last_row = len(self.rows)
+        return {'updates': {'updatedRange': f"'{self.title}'!A{first_row}:H{last_row}", 'updatedRows': len(rows)}}
+
+    def col_values(self, col):
+        self.client._record('col_values')
+        with self._lock:
+            values = [row[col - 1] if len(row) >= col else '' for row in self.rows]
+        # Like the API, trailing empty cells are not returned
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def get_all_values(self):
+        self.client._record('get_all_values')
+        with self._lock:
+            return [list(row) for row in self.rows]
+
+    def get(self, range_name):
+        self.client._record('get')
+        first_row, first_col, last_row, last_col = _parse_a1(range_name)
+        with self._lock:
+            rows = self.rows[first_row - 1:last_row]
+            return [row[first_col - 1:last_col] for row in rows]
+
+    def update(self, values=None, range_name=None, **kwargs):
+        self.client._record('update')
+        # Accept both the gspread 6 (values, range_name) and legacy (range_name, values) orders
+        if isinstance(values, str):
+            values, range_name = range_name, values
+        with self._lock:
+            self._write_range(range_name, values)
+        return {'updatedRange': range_name}
+
+    def batch_update(self, data, **kwargs):
+        self.client._record('batch_update')
+        with self._lock:
+            for entry in data:
+                self._write_range(entry['range'], entry['values'])
+        return {'totalUpdatedCells': sum(len(entry['values']) for entry in data)}
+
+    def update_cell(self, row, col, value):
+        self.client._record('update_cell')
+        with self._lock:
+            self._set_cell(row, col, str(value))
+
+    def append_row(self, values, **kwargs):
+        self.client._record('append_row')
+        with self._lock:
+            return self._append([values])
+
+    def append_rows(self, values, **kwargs):
+        self.client._record('append_rows')
+        with self._lock:
+            return self._append(values)
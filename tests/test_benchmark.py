@@ -0,0 +1,106 @@
+"""
+Per-request benchmarks for the quiz flows against the in-memory Sheets backend.
+Each scenario reports p50/p95 latency and Google Sheets calls per request, split into
+calls made on the request thread and calls deferred to the write-behind buffer.
+Run with `python -m pytest tests/test_benchmark.py` to see the numbers.
+"""
+import time
+
+from services.google_sheet_service import VocabularyWriteBuffer
+
+ROUNDS = 10
+# Injected per-call Sheets latency, so round trips show up in the latency numbers
+SHEETS_LATENCY = 0.005
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class RequestStats:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.inline_calls = []
+        self.deferred_calls = []
+
+    def measure(self, fake_sheets, send):
+        fake_sheets.reset_calls()
+        start = time.perf_counter()
+        response = send()
+        self.latencies.append(time.perf_counter() - start)
+        self.inline_calls.append(fake_sheets.total_calls)
+        # Writes queued by the request are charged to it
+        VocabularyWriteBuffer.flush()
+        self.deferred_calls.append(fake_sheets.total_calls - self.inline_calls[-1])
+        return response
+
+    def report(self, capsys):
+        count = len(self.latencies)
+        with capsys.disabled():
+            print(
+                f"\n{self.name:<18} n={count:<3} "
+                f"p50={percentile(self.latencies, 50) * 1000:7.2f}ms "
+                f"p95={percentile(self.latencies, 95) * 1000:7.2f}ms "
+                f"sheets/request inline={sum(self.inline_calls) / count:5.2f} "
+                f"deferred={sum(self.deferred_calls) / count:5.2f}"
+            )
+
+
+def _session_value(client, key):
+    with client.session_transaction() as session:
+        return session.get(key)
+
+
+def _stock_math_bank(client):
+    from services.math_bank_service import import_sheet_problems
+    with client.application.app_context():
+        import_sheet_problems()
+
+
+def test_vocab_request_benchmark(client, fake_sheets, capsys):
+    fake_sheets.latency = SHEETS_LATENCY
+    get_stats = RequestStats('vocab GET')
+    post_stats = RequestStats('vocab POST')
+
+    # The first request pays for authorizing, opening the worksheet and loading the word list
+    client.get('/')
+    VocabularyWriteBuffer.flush()
+
+    for _ in range(ROUNDS):
+        response = get_stats.measure(fake_sheets, lambda: client.get('/'))
+        assert response.status_code == 200
+        answer = _session_value(client, 'correct_answer')
+        response = post_stats.measure(fake_sheets, lambda: client.post('/', data={'answer': answer}))
+        assert response.status_code == 200
+        assert b'Correct!' in response.data
+
+    get_stats.report(capsys)
+    post_stats.report(capsys)
+
+    # Steady state: the word list comes from memory and writes never block the request
+    assert sum(get_stats.inline_calls) == 0
+    assert sum(post_stats.inline_calls) == 0
+
+
+def test_math_request_benchmark(client, fake_sheets, capsys):
+    fake_sheets.latency = SHEETS_LATENCY
+    get_stats = RequestStats('math GET')
+    post_stats = RequestStats('math POST')
+    _stock_math_bank(client)
+
+    for _ in range(ROUNDS):
+        response = get_stats.measure(fake_sheets, lambda: client.get('/math/'))
+        assert response.status_code == 200
+        answer = _session_value(client, 'math_correct_answer')
+        response = post_stats.measure(fake_sheets, lambda: client.post('/math/', data={'answer': str(answer)}))
+        assert response.status_code == 200
+
+    get_stats.report(capsys)
+    post_stats.report(capsys)
+
+    # Problems are served from the database bank, never from the sheet
+    assert sum(get_stats.inline_calls) == 0
+    assert sum(post_stats.inline_calls) == 0
@@ -0,0 +1,117 @@
+from services.google_sheet_service import GoogleSheetsService, VocabularyWriteBuffer
+
+
+def _vocabulary_rows(fake_sheets):
+    return fake_sheets.spreadsheets['test-sheet'].worksheets['Vocabulary'].rows
+
+
+def test_write_buffer_merges_writes_per_word(app, database, fake_sheets):
+    fake_sheets.reset_calls()
+    for definition in ('First draft.', 'Second draft.', 'To lessen in intensity.'):
+        assert VocabularyWriteBuffer.add('abate', definition)
+    assert VocabularyWriteBuffer.add('quixotic', 'Exceedingly idealistic.')
+    assert VocabularyWriteBuffer.pending_count() == 2
+    assert fake_sheets.total_calls == 0
+
+    assert VocabularyWriteBuffer.flush() == 2
+    rows = _vocabulary_rows(fake_sheets)
+    assert [row[:2] for row in rows if row[0] == 'abate'] == [['abate', 'To lessen in intensity.']]
+    assert rows[-1][:2] == ['quixotic', 'Exceedingly idealistic.']
+    # One ranged update for the existing word and one append for the new one
+    assert fake_sheets.calls['update'] == 1 and fake_sheets.calls['append_rows'] == 1
+    assert VocabularyWriteBuffer.pending_count() == 0
+
+
+def test_failed_flush_requeues_without_overwriting_newer_writes(app, database, fake_sheets, monkeypatch):
+    save = GoogleSheetsService.save_vocabulary_words
+
+    def failing_save(self, entries):
+        # A newer write for one of the words arrives while the flush is in flight
+        VocabularyWriteBuffer.add('abate', 'Newest definition.')
+        raise RuntimeError('Sheets unavailable')
+
+    VocabularyWriteBuffer.add('abate', 'Older definition.')
+    VocabularyWriteBuffer.add('abhor', 'To loathe.')
+    monkeypatch.setattr(GoogleSheetsService, 'save_vocabulary_words', failing_save)
+    assert VocabularyWriteBuffer.flush() == 0
+    assert VocabularyWriteBuffer.pending_count() == 2
+
+    monkeypatch.setattr(GoogleSheetsService, 'save_vocabulary_words', save)
+    VocabularyWriteBuffer.drain()
+    assert VocabularyWriteBuffer.pending_count() == 0
+    definitions = {row[0]: row[1] for row in _vocabulary_rows(fake_sheets)[1:]}
+    assert definitions['abate'] == 'Newest definition.' and definitions['abhor'] == 'To loathe.'
+
+
+def _wait_for_refresh(cache):
+    import time
+    deadline = time.monotonic() + 5
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not cache._refreshing
+
+
+def test_word_cache_serves_stale_words_during_one_background_refresh(monkeypatch):
+    import threading
+    from services.google_sheet_service import WordListCache
+    release = threading.Event()
+    fetches = []
+
+    def slow_fetch():
+        fetches.append(1)
+        release.wait(5)
+        return ['abate', 'zealous']
+
+    WordListCache._store(('abate',), expired=True)
+    monkeypatch.setattr(WordListCache, '_fetch', slow_fetch)
+    try:
+        assert [WordListCache.get_words() for _ in range(3)] == [('abate',)] * 3
+        assert len(fetches) == 1
+    finally:
+        release.set()
+    _wait_for_refresh(WordListCache)
+    assert WordListCache.get_words() == ('abate', 'zealous')
+    WordListCache.invalidate()
+
+
+def test_word_cache_retries_after_serving_the_fallback(monkeypatch):
+    from services.google_sheet_service import FALLBACK_WORDS, WordListCache
+    results = [RuntimeError('Sheets unavailable'), ['abate', 'zealous']]
+
+    def flaky_fetch():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    WordListCache.invalidate()
+    monkeypatch.setattr(WordListCache, '_fetch', flaky_fetch)
+    assert WordListCache.get_words() == FALLBACK_WORDS
+    # The fallback is stored as already expired, so the next read retries in the background
+    assert WordListCache.get_words() == FALLBACK_WORDS
+    _wait_for_refresh(WordListCache)
+    assert WordListCache.get_words() == ('abate', 'zealous')
+    WordListCache.invalidate()
+
+
+def test_math_mirror_fetches_only_rows_added_since_the_last_load(fake_sheets, monkeypatch):
+    from config import Config
+    from services.google_sheet_service import SheetRowIndex
+    from tests.conftest import TEST_PROBLEMS
+    service = GoogleSheetsService({}, 'test-sheet')
+    assert len(service.load_math_problems()) == len(TEST_PROBLEMS)
+
+    worksheet = fake_sheets.spreadsheets['test-sheet'].worksheets['MathProblems']
+    worksheet.rows.extend([
+        ['31', 'What is 31 + 31?', '62', 'Number', 'Mental math', 'easy', '31 + 31 = 62', ''],
+        ['32', 'What is 32 + 32?', '64', 'Number', 'Mental math', 'easy', '32 + 32 = 64', ''],
+    ])
+    monkeypatch.setattr(Config, 'MATH_SYNC_INTERVAL_SECONDS', 0)
+    fake_sheets.reset_calls()
+
+    problems = service.load_math_problems()
+    assert fake_sheets.calls['get'] == 1 and not fake_sheets.calls['get_all_values']
+    assert [problem['id'] for problem in problems[-2:]] == [31, 32]
+    assert problems[-1]['correct_answer'] == 64
+    index = SheetRowIndex._indexes[service._index_key('MathProblems')]
+    assert index['31'] == len(TEST_PROBLEMS) + 2 and index['32'] == len(TEST_PROBLEMS) + 3
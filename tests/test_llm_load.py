@@ -0,0 +1,133 @@
+"""
+Concurrency harness for the quiz flows with the local fake LLM as the OpenAI backend.
+Several logged-in clients run a flow at once; each scenario reports p50/p95 latency per request
+and the LLM calls made, by kind. Run with `python -m pytest tests/test_llm_load.py` to see the numbers.
+"""
+import threading
+import time
+
+import pytest
+
+from tests.conftest import TEST_WORDS
+from tests.test_benchmark import percentile
+
+USERS = (('loke', 'latha'), ('adarsh', 'sridhar'))
+CLIENTS_PER_USER = 2
+ROUNDS = 5
+# Injected per-call LLM latency, so generation shows up in the request latency
+LLM_LATENCY = 0.02
+
+
+def run_concurrently(app, flow):
+    """Runs flow(client, latencies) on CLIENTS_PER_USER clients per user at once; returns latencies and errors."""
+    latencies = {}
+    errors = []
+    lock = threading.Lock()
+    clients = []
+    for username, password in USERS:
+        for _ in range(CLIENTS_PER_USER):
+            client = app.test_client()
+            assert client.post('/login', data={'username': username, 'password': password}).status_code == 302
+            clients.append(client)
+
+    def timed(name, send):
+        start = time.perf_counter()
+        try:
+            response = send()
+        except Exception as e:
+            with lock:
+                errors.append(f"{name}: {e}")
+            return None
+        with lock:
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+        if response.status_code != 200:
+            with lock:
+                errors.append(f"{name}: HTTP {response.status_code}")
+        return response
+
+    threads = [threading.Thread(target=flow, args=(client, timed)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def report(capsys, scenario, latencies, fake_llm):
+    with capsys.disabled():
+        for name, values in latencies.items():
+            print(
+                f"\n{scenario + ' ' + name:<24} n={len(values):<3} "
+                f"p50={percentile(values, 50) * 1000:7.2f}ms p95={percentile(values, 95) * 1000:7.2f}ms"
+            )
+        print(f"{scenario:<24} llm calls={dict(fake_llm.calls)}")
+
+
+def test_vocab_flow_under_concurrency(app, database, fake_sheets, fake_llm, capsys):
+    from database.models import WordData
+    with app.app_context():
+        # Nothing is enriched yet, so questions are generated inline
+        WordData.query.delete()
+        database.session.commit()
+    fake_llm.latency_seconds = LLM_LATENCY
+
+    def flow(client, timed):
+        for _ in range(ROUNDS):
+            if timed('GET', lambda: client.get('/')) is None:
+                continue
+            with client.session_transaction() as session:
+                answer = session.get('correct_answer')
+            timed('POST', lambda: client.post('/', data={'answer': answer}))
+
+    latencies, errors = run_concurrently(app, flow)
+    report(capsys, 'vocab', latencies, fake_llm)
+
+    assert not errors, errors
+    with app.app_context():
+        generated = WordData.query.count()
+    # Each word is generated once however many clients draw it at the same time
+    assert 0 < generated <= len(TEST_WORDS)
+    assert fake_llm.calls['question_material'] == generated
+    assert fake_llm.calls['similar_words'] <= len({word.lower() for word in TEST_WORDS})
+
+
+def test_math_flow_under_concurrency(app, database, fake_sheets, fake_llm, capsys):
+    from services.math_bank_service import refill_bank, all_buckets
+    with app.app_context():
+        refill_bank(target_depth=1, max_problems=len(all_buckets()))
+    stocked = fake_llm.calls['math_problem']
+    fake_llm.latency_seconds = LLM_LATENCY
+    fake_llm.reset_calls()
+
+    def flow(client, timed):
+        for _ in range(ROUNDS):
+            if timed('GET', lambda: client.get('/math/')) is None:
+                continue
+            timed('POST', lambda: client.post('/math/', data={'answer': 'wrong'}))
+
+    latencies, errors = run_concurrently(app, flow)
+    report(capsys, 'math', latencies, fake_llm)
+
+    assert not errors, errors
+    assert stocked == len(all_buckets())
+    # Problems come from the bank with their explanations, nothing is generated on the request path
+    assert fake_llm.total_calls == 0
+
+
+def test_fake_llm_is_deterministic_and_injects_failures(fake_llm):
+    from openai.error import RateLimitError
+    from services import openai_service
+    from services.llm_backend import FakeLLM
+
+    first = openai_service.fetch_question_material('laconic')
+    second = openai_service.fetch_question_material('laconic')
+    assert first['path'] == 'combined' and first['definition'] == second['definition']
+    assert len(first['incorrect_options']) == 3
+    assert len(openai_service.request_similar_words('laconic', num_words=4)) == 4
+    problem = openai_service.generate_math_problem('Number', 'Fractions', 'hard')
+    assert problem['topic'] == 'Fractions' and isinstance(problem['correct_answer'], int)
+
+    always_limited = FakeLLM(rate_limit_rate=1.0)
+    with pytest.raises(RateLimitError):
+        always_limited(model='m', messages=[{'role': 'user', 'content': 'Define the word \'x\'.'}])
+    assert always_limited.calls['definition'] == 1
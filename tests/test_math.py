@@ -0,0 +1,220 @@
+from database.models import MathProblem
+from services.math_bank_service import MathBankRefiller, all_buckets
+
+
+def test_refiller_imports_sheet_and_fills_every_bucket(app, client, fake_sheets, offline_llm):
+    refiller = MathBankRefiller(app, target_depth=1, batch_size=len(all_buckets()))
+
+    added = refiller.run_once()
+    with app.app_context():
+        counts = MathProblem.bucket_counts()
+    # The 30 sheet problems share one bucket, every other bucket gets one generated problem
+    assert added == 30 + len(all_buckets()) - 1
+    assert all(counts.get(bucket, 0) >= 1 for bucket in all_buckets())
+    assert offline_llm.count('math_problem') == len(all_buckets()) - 1
+    assert len(fake_sheets.spreadsheets['test-sheet'].worksheet('MathProblems').get_all_values()) == 1 + added
+
+    assert refiller.run_once() == 0
+
+
+def test_serving_problems_never_generates_inline(client, app, offline_llm):
+    from services.math_bank_service import import_sheet_problems
+    with app.app_context():
+        import_sheet_problems()
+
+    seen = set()
+    for _ in range(10):
+        assert client.get('/math/').status_code == 200
+        with client.session_transaction() as session:
+            seen.add(session['math_problem']['id'])
+    assert len(seen) == 10
+    assert 'math_problem' not in offline_llm
+
+
+def test_generated_explanations_are_stored_and_reused(client, app, fake_sheets, offline_llm):
+    from database.db import db
+    from services.math_bank_service import import_sheet_problems, push_explanations
+    with app.app_context():
+        import_sheet_problems()
+        problem = db.session.get(MathProblem, '5')
+        problem.explanation = None
+        db.session.commit()
+        problem = problem.to_dict()
+
+    from services.math_service import get_problem_explanation
+    for _ in range(3):
+        with app.app_context():
+            assert get_problem_explanation(problem, problem['correct_answer']) == 'The answer is 10.'
+    assert offline_llm.count('explanation') == 1
+
+    with app.app_context():
+        assert push_explanations() == 1
+        assert MathProblem.pending_explanations() == {}
+    sheet_rows = fake_sheets.spreadsheets['test-sheet'].worksheet('MathProblems').get_all_values()
+    assert sheet_rows[5][6] == 'The answer is 10.'
+
+
+def test_fill_explanations_command(client, app, offline_llm):
+    from database.db import db
+    with app.app_context():
+        MathProblem.add_problems([
+            {'id': f'new{i}', 'question': f'What is {i} x 2?', 'correct_answer': i * 2,
+             'category': 'Number', 'topic': 'Mental math', 'difficulty': 'easy', 'explanation': ''}
+            for i in range(3)
+        ])
+
+    result = app.test_cli_runner().invoke(args=['fill-explanations'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Explained 3 of 3 problems' in result.output
+    with app.app_context():
+        assert MathProblem.missing_explanations() == []
+        assert db.session.get(MathProblem, 'new1').explanation == 'The answer is 2.'
+
+
+def test_explanation_is_streamed_and_stored(client, app, offline_llm):
+    import json
+    from database.db import db
+    from services.math_bank_service import import_sheet_problems
+    with app.app_context():
+        import_sheet_problems()
+        problem = db.session.get(MathProblem, '7')
+        problem.explanation = None
+        db.session.commit()
+        problem = problem.to_dict()
+    with client.session_transaction() as session:
+        session['math_problem'] = problem
+        session['math_correct_answer'] = problem['correct_answer']
+
+    # The explanation would give the answer away before the problem is answered
+    assert client.get('/math/stream_explanation').status_code == 400
+    assert 'explanation_stream' not in offline_llm
+
+    # The answer page no longer waits for the explanation, it links to the stream instead
+    response = client.post('/math/', data={'answer': '-1'})
+    assert b'/math/stream_explanation' in response.data
+    assert 'explanation' not in offline_llm
+
+    response = client.get('/math/stream_explanation')
+    assert response.mimetype == 'text/event-stream'
+    events = [block.split('\n') for block in response.get_data(as_text=True).strip().split('\n\n')]
+    tokens = [json.loads(data[6:]) for event, data in events if event == 'event: token']
+    results = [json.loads(data[6:]) for event, data in events if event == 'event: result']
+    assert ''.join(tokens) == 'The answer is 14.'
+    assert results == ['The answer is 14.']
+
+    # The finished explanation is stored, so the next stream is served from the database
+    response = client.get('/math/stream_explanation')
+    assert 'event: token' not in response.get_data(as_text=True)
+    assert offline_llm.count('explanation_stream') == 1
+    with app.app_context():
+        assert MathProblem.get_explanation('7') == 'The answer is 14.'
+
+
+def test_correctly_answered_problem_is_not_explained(client, app, offline_llm):
+    from services.math_bank_service import import_sheet_problems
+    with app.app_context():
+        import_sheet_problems()
+    client.get('/math/')
+    with client.session_transaction() as session:
+        answer = session['math_correct_answer']
+
+    client.post('/math/', data={'answer': str(answer)})
+    assert client.get('/math/stream_explanation').status_code == 400
+
+    # Nor is the next problem, which has not been answered yet
+    client.post('/math/', data={'answer': '-1'})
+    client.get('/math/')
+    assert client.get('/math/stream_explanation').status_code == 400
+    assert 'explanation_stream' not in offline_llm
+
+
+def test_refiller_keeps_filling_while_sheets_is_down(app, client, fake_sheets, offline_llm, monkeypatch):
+    from services.google_sheet_service import GoogleSheetsService
+    from tests.fake_sheets import FakeWorksheet
+    from_config = GoogleSheetsService.from_config
+    refiller = MathBankRefiller(app, target_depth=1, batch_size=len(all_buckets()))
+
+    def unconfigured():
+        raise RuntimeError('GOOGLE_CREDENTIALS_JSON is not set')
+
+    monkeypatch.setattr(GoogleSheetsService, 'from_config', staticmethod(unconfigured))
+    assert refiller.run_once() == len(all_buckets())
+    assert not refiller._imported
+    assert offline_llm.count('math_problem') == len(all_buckets())
+
+    def unavailable(self):
+        raise RuntimeError('503 Service Unavailable')
+
+    # A failed read is retried on the next pass rather than counted as an empty sheet
+    get_all_values = FakeWorksheet.get_all_values
+    monkeypatch.setattr(GoogleSheetsService, 'from_config', from_config)
+    monkeypatch.setattr(FakeWorksheet, 'get_all_values', unavailable)
+    refiller.run_once()
+    assert not refiller._imported
+
+    monkeypatch.setattr(FakeWorksheet, 'get_all_values', get_all_values)
+    assert refiller.run_once() == 30
+    assert refiller._imported
+
+
+def _bank_problem_without_explanation(app, problem_id='7'):
+    from database.db import db
+    from services.math_bank_service import import_sheet_problems
+    with app.app_context():
+        import_sheet_problems()
+        problem = db.session.get(MathProblem, problem_id)
+        problem.explanation = None
+        db.session.commit()
+        return problem.to_dict()
+
+
+def test_concurrent_explanation_streams_share_one_generation(app, database, fake_sheets, monkeypatch):
+    import threading
+    import time
+    from services import math_service, openai_service
+    problem = _bank_problem_without_explanation(app)
+    streams = []
+
+    def slow_stream(question, answer):
+        streams.append(question)
+        for text in ('The answer ', 'is ', f'{answer}.'):
+            time.sleep(0.1)
+            yield text
+
+    monkeypatch.setattr(openai_service, 'stream_problem_explanation', slow_stream)
+    results = []
+
+    def request_explanation():
+        with app.app_context():
+            events = list(math_service.stream_problem_explanation(problem, problem['correct_answer']))
+            results.append(events[-1])
+
+    threads = [threading.Thread(target=request_explanation) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(streams) == 1
+    assert results == [('result', 'The answer is 14.')] * 4
+
+
+def test_explanation_leased_by_another_worker_is_waited_for(app, database, fake_sheets, offline_llm):
+    import threading
+    from database.models import GenerationLease
+    from services.math_service import get_problem_explanation
+    problem = _bank_problem_without_explanation(app)
+    with app.app_context():
+        assert GenerationLease.acquire('explanation:7', ttl_seconds=60)
+
+    def other_worker_finishes():
+        with app.app_context():
+            MathProblem.set_explanation('7', 'Add 7 and 7 to get 14.')
+
+    timer = threading.Timer(0.3, other_worker_finishes)
+    timer.start()
+    with app.app_context():
+        assert get_problem_explanation(problem, problem['correct_answer']) == 'Add 7 and 7 to get 14.'
+    timer.join()
+    assert 'explanation' not in offline_llm
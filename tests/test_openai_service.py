@@ -0,0 +1,206 @@
+import pytest
+from openai.error import InvalidRequestError, RateLimitError
+
+from services import openai_service
+from services.openai_service import CircuitBreaker, LLMUnavailableError, TokenBucket
+
+
+@pytest.fixture
+def fresh_limits(monkeypatch):
+    """Give each test its own limiter and breaker and skip the backoff sleeps."""
+    monkeypatch.setattr(openai_service, 'rate_limiter', TokenBucket(1000, 1000))
+    monkeypatch.setattr(openai_service, 'circuit_breaker', CircuitBreaker(failure_threshold=2, reset_seconds=60))
+    monkeypatch.setattr(openai_service.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(openai_service.Config, 'OPENAI_MAX_RETRIES', 2)
+
+
+def test_transient_errors_are_retried(fresh_limits, monkeypatch):
+    attempts = []
+
+    def flaky_create(**kwargs):
+        attempts.append(kwargs)
+        if len(attempts) < 3:
+            raise RateLimitError('slow down')
+        return {'choices': [{'message': {'content': 'ok'}}]}
+
+    monkeypatch.setattr(openai_service.openai.ChatCompletion, 'create', flaky_create)
+    assert openai_service._chat_completion('test', model='m', messages=[])['choices'][0]['message']['content'] == 'ok'
+    assert len(attempts) == 3
+    assert attempts[0]['request_timeout'] == openai_service.Config.OPENAI_REQUEST_TIMEOUT_SECONDS
+    assert openai_service.circuit_breaker.state == 'closed'
+
+
+def test_breaker_opens_and_fails_fast(fresh_limits, monkeypatch):
+    attempts = []
+
+    def failing_create(**kwargs):
+        attempts.append(kwargs)
+        raise RateLimitError('slow down')
+
+    monkeypatch.setattr(openai_service.openai.ChatCompletion, 'create', failing_create)
+    for _ in range(2):
+        with pytest.raises(RateLimitError):
+            openai_service._chat_completion('test', model='m', messages=[])
+    assert openai_service.circuit_breaker.state == 'open'
+
+    calls_before = len(attempts)
+    with pytest.raises(LLMUnavailableError):
+        openai_service._chat_completion('test', model='m', messages=[])
+    assert len(attempts) == calls_before
+
+    # A failed trial call after the reset timeout opens the breaker again
+    openai_service.circuit_breaker.reset_seconds = 0
+    with pytest.raises(RateLimitError):
+        openai_service._chat_completion('test', model='m', messages=[])
+    assert openai_service.circuit_breaker.state == 'open'
+
+
+def test_inconclusive_trial_call_does_not_leave_the_breaker_half_open(fresh_limits, monkeypatch):
+    def healthy(**kwargs):
+        return {'choices': [{'message': {'content': 'ok'}}]}
+
+    def bad_create(**kwargs):
+        raise InvalidRequestError('bad prompt', param=None)
+
+    def open_breaker():
+        openai_service.circuit_breaker.state = 'open'
+        openai_service.circuit_breaker._opened_at = openai_service.time.monotonic() - 61
+
+    # A non-retryable error during the trial says nothing about the API's health
+    open_breaker()
+    monkeypatch.setattr(openai_service.openai.ChatCompletion, 'create', bad_create)
+    with pytest.raises(InvalidRequestError):
+        openai_service._chat_completion('test', model='m', messages=[])
+    assert openai_service.circuit_breaker.state == 'open'
+    monkeypatch.setattr(openai_service.openai.ChatCompletion, 'create', healthy)
+    openai_service._chat_completion('test', model='m', messages=[])
+    assert openai_service.circuit_breaker.state == 'closed'
+
+    # Neither does a trial that never reaches the API because the limiter is saturated
+    open_breaker()
+    monkeypatch.setattr(openai_service.rate_limiter, 'acquire', lambda timeout: False)
+    with pytest.raises(LLMUnavailableError, match='rate limiter'):
+        openai_service._chat_completion('test', model='m', messages=[])
+    assert openai_service.circuit_breaker.state == 'open'
+    monkeypatch.setattr(openai_service.rate_limiter, 'acquire', lambda timeout: True)
+    openai_service._chat_completion('test', model='m', messages=[])
+    assert openai_service.circuit_breaker.state == 'closed'
+
+
+def test_bad_requests_are_not_retried(fresh_limits, monkeypatch):
+    attempts = []
+
+    def bad_create(**kwargs):
+        attempts.append(kwargs)
+        raise InvalidRequestError('bad prompt', param=None)
+
+    monkeypatch.setattr(openai_service.openai.ChatCompletion, 'create', bad_create)
+    with pytest.raises(InvalidRequestError):
+        openai_service._chat_completion('test', model='m', messages=[])
+    assert len(attempts) == 1
+    assert openai_service.circuit_breaker.state == 'closed'
+
+
+def test_placeholder_material_is_never_stored(app, database, fresh_limits, monkeypatch):
+    from database.models import WordData
+    from services.enrichment_service import enrich_word
+
+    openai_service.circuit_breaker.state = 'open'
+    openai_service.circuit_breaker._opened_at = openai_service.time.monotonic()
+
+    with app.app_context():
+        material = enrich_word('quixotic')
+        assert material['placeholder'] and material['path'] == 'unavailable'
+        assert openai_service.is_placeholder(material['definition'])
+        assert not WordData.word_exists('quixotic')
+
+
+def test_streamed_completions_yield_content_deltas(fresh_limits, monkeypatch):
+    def streaming_create(**kwargs):
+        assert kwargs['stream'] is True
+        yield {'choices': [{'delta': {'role': 'assistant'}}]}
+        for text in ('candid: Frank.\n', 'open: ', 'Not hiding anything.'):
+            yield {'choices': [{'delta': {'content': text}}]}
+
+    monkeypatch.setattr(openai_service.openai.ChatCompletion, 'create', streaming_create)
+    content = ''.join(openai_service.stream_similar_words('honest', num_words=2))
+    assert openai_service.parse_similar_words(content, 2) == [
+        {'word': 'candid', 'definition': 'Frank.'}, {'word': 'open', 'definition': 'Not hiding anything.'}
+    ]
+
+
+def test_failed_stream_counts_once_towards_the_breaker(fresh_limits, monkeypatch):
+    def unavailable_create(**kwargs):
+        raise openai_service.ServiceUnavailableError('Service unavailable')
+
+    def broken_stream(**kwargs):
+        yield {'choices': [{'delta': {'content': 'candid: '}}]}
+        raise openai_service.APIConnectionError('Connection reset')
+
+    # Opening the stream fails after its retries: one failure, so the breaker (threshold 2) stays closed
+    monkeypatch.setattr(openai_service.openai.ChatCompletion, 'create', unavailable_create)
+    with pytest.raises(openai_service.ServiceUnavailableError):
+        list(openai_service.stream_similar_words('honest'))
+    assert openai_service.circuit_breaker._failures == 1
+    assert openai_service.circuit_breaker.state == 'closed'
+
+    # The stream opens (a success) and then fails while it is read, which is recorded once
+    monkeypatch.setattr(openai_service.openai.ChatCompletion, 'create', broken_stream)
+    with pytest.raises(openai_service.APIConnectionError):
+        list(openai_service.stream_similar_words('honest'))
+    assert openai_service.circuit_breaker._failures == 1
+
+
+def test_calls_are_recorded_per_feature_and_endpoint(client, fake_llm, monkeypatch):
+    from services.llm_metrics import LLMMetrics
+    LLMMetrics.reset()
+    assert openai_service.fetch_question_material('laconic')['path'] == 'combined'
+    fake_llm.rate_limit_rate = 1.0
+    openai_service.circuit_breaker.failure_threshold = 1
+    monkeypatch.setattr(openai_service.Config, 'OPENAI_MAX_RETRIES', 0)
+    assert openai_service.fetch_definition('laconic').startswith('Definition not available')
+    assert openai_service.fetch_definition('laconic').startswith('Definition not available')
+    fake_llm.rate_limit_rate = 0.0
+    openai_service.circuit_breaker.record_success()
+    assert client.post('/get_similar_words', data={'word': 'laconic'}).status_code == 200
+
+    metrics = client.get('/metrics').get_json()['llm']
+    material = metrics['features']['question_material']
+    assert material['outcomes']['success'] == 1
+    assert material['prompt_tokens'] > 0 and material['completion_tokens'] > 0 and material['cost_usd'] > 0
+    assert material['latency_seconds']['count'] == 1
+    assert metrics['features']['definition']['outcomes'] == {'success': 0, 'rate_limited': 1, 'error': 0, 'placeholder': 1}
+    assert metrics['endpoints']['background']['calls'] == 3
+    assert metrics['endpoints']['vocab_game_blueprint.get_similar_words']['outcomes']['success'] == 1
+
+    # Prometheus scrapes a separate endpoint that needs the metrics token rather than a login
+    scraper = client.application.test_client()
+    assert scraper.get('/metrics').status_code == 302
+    assert scraper.get('/metrics/prometheus').status_code == 404
+    monkeypatch.setattr(openai_service.Config, 'METRICS_TOKEN', 'scrape-secret')
+    assert scraper.get('/metrics/prometheus').status_code == 401
+    assert scraper.get('/metrics/prometheus', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = scraper.get('/metrics/prometheus', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert 'llm_feature_calls_total{feature="question_material",outcome="success"} 1' in response.get_data(as_text=True)
+
+
+def test_answering_a_placeholder_question_leaves_the_sheet_alone(client, app, fake_sheets):
+    from database.db import db
+    from database.models import Vocabulary
+    from services.google_sheet_service import VocabularyWriteBuffer
+    sheet = fake_sheets.spreadsheets['test-sheet'].worksheets['Vocabulary']
+    before = [list(row) for row in sheet.rows]
+    placeholder = "Definition not available due to API rate limit."
+    with client.session_transaction() as flask_session:
+        flask_session['word'] = 'abate'
+        flask_session['correct_answer'] = placeholder
+        flask_session['options'] = [placeholder] + ["Incorrect option not available due to API rate limit."] * 3
+
+    assert client.post('/', data={'answer': placeholder}).status_code == 200
+    VocabularyWriteBuffer.flush()
+
+    assert sheet.rows == before
+    with app.app_context():
+        row = db.session.get(Vocabulary, 'abate')
+        assert not row.needs_push and not openai_service.is_placeholder(row.definition)
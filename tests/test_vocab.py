@@ -0,0 +1,353 @@
+from database.db import db
+from database.models import Vocabulary
+from services.google_sheet_service import WordListCache
+from services.vocab_sync_service import sync_vocabulary
+from tests.conftest import TEST_WORDS
+
+
+def test_sync_vocabulary_reconciles_both_directions(app, database, fake_sheets):
+    sheet = fake_sheets.spreadsheets['test-sheet'].worksheets['Vocabulary']
+    sheet.rows.append(['zealous', 'Having great energy or enthusiasm.', ''])
+    with app.app_context():
+        db.session.add(Vocabulary(word='quixotic', definition='Exceedingly idealistic.', needs_push=True))
+        db.session.commit()
+
+        WordListCache.get_words()
+        stats = sync_vocabulary(batch_size=5)
+        assert WordListCache._words is None
+
+        assert stats['pulled'] == 1
+        assert stats['pushed'] == 1
+        assert set(Vocabulary.get_words()) == set(TEST_WORDS) | {'zealous', 'quixotic'}
+        assert not Vocabulary.query.filter_by(needs_push=True).count()
+    assert ['quixotic', 'Exceedingly idealistic.'] == sheet.rows[-1][:2]
+
+    # A second pass has nothing left to move
+    with app.app_context():
+        stats = sync_vocabulary()
+    assert stats['pulled'] == 0 and stats['pushed'] == 0
+
+    # Pulled words are recorded as synced, so serving one doesn't write it back to the sheet
+    from services.vocab_service import queue_sheet_write
+    with app.test_request_context():
+        assert not queue_sheet_write('zealous', 'Having great energy or enthusiasm.')
+        assert not db.session.get(Vocabulary, 'zealous').needs_push
+
+
+def test_quiz_reads_words_without_calling_sheets(client, fake_sheets):
+    fake_sheets.reset_calls()
+    response = client.get('/')
+    assert response.status_code == 200
+    assert fake_sheets.total_calls == 0
+
+
+def test_similar_words_are_cached_and_failures_negative_cached(client, monkeypatch):
+    from openai.error import RateLimitError
+    import services.similar_words_service as similar_words_service
+    requested = []
+
+    def fake_request(word, num_words=4):
+        requested.append(word)
+        if word == 'broken':
+            raise RuntimeError('API down')
+        if word == 'throttled':
+            raise RateLimitError('Rate limit reached')
+        return [{'word': f'{word}-like', 'definition': 'Similar.'}]
+
+    monkeypatch.setattr(similar_words_service, 'request_similar_words', fake_request)
+    similar_words_service._memory_cache.clear()
+    similar_words_service._stats.clear()
+
+    for word in ('Candid', 'candid ', 'broken', 'broken'):
+        response = client.post('/get_similar_words', data={'word': word})
+        assert response.status_code == 200
+    assert requested == ['Candid', 'broken']
+    assert response.get_json()['similar_words'] == similar_words_service.UNAVAILABLE
+
+    # A new process starts with an empty LRU and is served from the database
+    similar_words_service._memory_cache.clear()
+    response = client.post('/get_similar_words', data={'word': 'candid'})
+    assert response.get_json()['similar_words'] == [{'word': 'Candid-like', 'definition': 'Similar.'}]
+    assert requested == ['Candid', 'broken']
+
+    stats = client.get('/similar_words_stats').get_json()
+    assert stats['misses'] == 2 and stats['db_hits'] >= 1 and stats['failures'] == 1
+    assert stats['negative_hits'] == 1
+
+    # Throttling isn't cached, so it is a failure each time but never a negative hit
+    for _ in range(2):
+        response = client.post('/get_similar_words', data={'word': 'throttled'})
+        assert response.get_json()['similar_words'] == similar_words_service.UNAVAILABLE
+    assert requested[-2:] == ['throttled', 'throttled']
+    stats = client.get('/similar_words_stats').get_json()
+    assert stats['failures'] == 3 and stats['negative_hits'] == 1
+
+
+def test_enrichment_worker_fills_missing_word_data(app, database, offline_llm):
+    from database.models import WordData
+    from services.enrichment_service import EnrichmentWorker, find_unenriched_words
+    with app.app_context():
+        db.session.add_all([Vocabulary(word='obdurate'), Vocabulary(word='pellucid'), Vocabulary(word='quotidian')])
+        db.session.commit()
+        assert find_unenriched_words() == ['obdurate', 'pellucid', 'quotidian']
+
+    worker = EnrichmentWorker(app, max_workers=2, batch_size=2)
+    assert worker.run_once() == 2
+    assert worker.run_once() == 1
+    assert worker.run_once() == 0
+
+    with app.app_context():
+        assert find_unenriched_words() == []
+        assert WordData.get_correct_answer('pellucid') == 'Definition of pellucid.'
+    assert offline_llm.count('question_material') == 3
+
+
+def test_enrich_words_command_resumes_from_checkpoint(app, database, offline_llm, tmp_path):
+    from database.models import WordData
+    words_file = tmp_path / 'words.txt'
+    words_file.write_text('abate\nlaconic\nmendacious\nlaconic\nnefarious\n')
+    checkpoint = tmp_path / 'checkpoint'
+    checkpoint.write_text('nefarious\n')
+
+    result = app.test_cli_runner().invoke(args=[
+        'enrich-words', '--file', str(words_file), '--checkpoint', str(checkpoint), '--batch-size', '1', '--concurrency', '2'
+    ])
+
+    assert result.exit_code == 0, result.output
+    assert 'Enriched 2 of 2 words' in result.output
+    assert 'ETA' in result.output
+    assert offline_llm.count('question_material') == 2
+    assert set(checkpoint.read_text().split()) == {'nefarious', 'laconic', 'mendacious'}
+    with app.app_context():
+        assert WordData.word_exists('laconic') and WordData.word_exists('mendacious')
+        assert db.session.get(Vocabulary, 'laconic').needs_push
+
+
+def test_concurrent_requests_for_a_new_word_generate_it_once(app, database, monkeypatch):
+    import threading
+    import time
+    from database.models import WordData
+    import services.enrichment_service as enrichment_service
+    calls = []
+
+    def slow_question_material(word, num_options=3):
+        calls.append(word)
+        time.sleep(0.2)
+        return {'definition': f'Definition of {word}.', 'path': 'combined',
+                'incorrect_options': [f'Wrong meaning {i} of {word}.' for i in range(num_options)]}
+
+    monkeypatch.setattr(enrichment_service, 'fetch_question_material', slow_question_material)
+    results = []
+
+    def request_word():
+        with app.app_context():
+            results.append(enrichment_service.enrich_word('quixotic'))
+
+    threads = [threading.Thread(target=request_word) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['quixotic']
+    assert all(result and result['definition'] == 'Definition of quixotic.' for result in results)
+    with app.app_context():
+        assert WordData.query.filter_by(word='quixotic').count() == 1
+
+
+def test_word_leased_by_another_worker_is_waited_for(app, database, offline_llm):
+    import threading
+    from database.models import GenerationLease, WordData
+    from services.enrichment_service import enrich_word
+
+    with app.app_context():
+        assert GenerationLease.acquire('word:quixotic', ttl_seconds=60)
+
+    def other_worker_finishes():
+        with app.app_context():
+            WordData(word='quixotic', definition='Exceedingly idealistic.', incorrect_options='[]').add_word_data()
+
+    timer = threading.Timer(0.3, other_worker_finishes)
+    timer.start()
+    with app.app_context():
+        assert enrich_word('quixotic') is None
+    timer.join()
+    assert 'question_material' not in offline_llm
+
+
+def test_similar_words_stream_and_cache_the_result(client, offline_llm):
+    import json
+    import services.similar_words_service as similar_words_service
+    similar_words_service._memory_cache.clear()
+
+    response = client.get('/stream_similar_words?word=candid')
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert body.count('event: token') == 8
+    result = [json.loads(block.split('\n')[1][6:]) for block in body.split('\n\n') if block.startswith('event: result')]
+    assert result == [[{'word': f'candid-{i}', 'definition': 'Related to candid.'} for i in range(4)]]
+
+    # Later lookups, streamed or not, come from the cache
+    assert client.post('/get_similar_words', data={'word': 'candid'}).get_json()['similar_words'] == result[0]
+    assert 'event: token' not in client.get('/stream_similar_words?word=candid').get_data(as_text=True)
+    assert offline_llm.count('similar_words_stream') == 1
+
+
+def test_next_word_is_sampled_in_the_database(app, database):
+    from database.models import WordCount, WordData
+    from tests.test_models import _record_queries
+    words = sorted(TEST_WORDS)
+    learned, unlearned = words[:-2], words[-2:]
+    with app.app_context():
+        db.session.add_all([WordCount(word=word, updated_by='loke', count=1) for word in learned])
+        db.session.add(WordCount(word=unlearned[1], updated_by='adarsh', count=3))
+        WordData.query.filter_by(word=unlearned[1]).delete()
+        db.session.commit()
+
+        def sample():
+            for _ in range(10):
+                assert Vocabulary.sample_unlearned_words('loke', enriched_only=True) == [unlearned[0]]
+            assert set(Vocabulary.sample_unlearned_words('loke')) == set(unlearned)
+            assert set(Vocabulary.sample_unlearned_words('adarsh')) == set(words) - {unlearned[1]}
+            assert len(Vocabulary.sample_unlearned_words('loke', max_count=None, limit=3)) == 3
+
+        _, statements = _record_queries(sample)
+        # The word list is never sent to the database
+        assert statements and not any(' IN (' in sql for sql, parameters in statements)
+
+
+def test_daily_limit_counts_attempts(client, app, monkeypatch):
+    from config import Config
+    from database.models import DailyAttempts
+    monkeypatch.setattr(Config, 'DAILY_VOCAB_ATTEMPT_LIMIT', 3)
+
+    for _ in range(3):
+        assert client.get('/').status_code == 200
+        with client.session_transaction() as flask_session:
+            word = flask_session['word']
+        client.post('/', data={'answer': 'wrong answer', 'word': word})
+
+    with app.app_context():
+        assert DailyAttempts.get_today('loke') == 3
+    response = client.get('/')
+    assert response.status_code == 302 and 'limit_reached=True' in response.location
+
+
+def test_default_words_are_seeded_in_one_call_and_indexed(fake_sheets):
+    from services.google_sheet_service import DEFAULT_WORDS, GoogleSheetsService
+    sheet = fake_sheets.spreadsheets['test-sheet'].worksheets['Vocabulary']
+    del sheet.rows[1:]
+    service = GoogleSheetsService({}, 'test-sheet')
+    fake_sheets.reset_calls()
+
+    assert service.load_words() == list(DEFAULT_WORDS)
+    assert fake_sheets.calls['append_rows'] == 1 and not fake_sheets.calls['append_row']
+    assert len(sheet.rows) == 1 + len(DEFAULT_WORDS)
+
+    # A seeded word is updated in place, not appended again
+    service.save_vocabulary_words([('abate', 'To become less intense.', '2026-10-18 12:00:00')])
+    assert len(sheet.rows) == 1 + len(DEFAULT_WORDS)
+    assert sheet.rows[DEFAULT_WORDS.index('abate') + 1][:2] == ['abate', 'To become less intense.']
+
+
+def test_quiz_serves_the_whole_sheet_before_the_first_sync(client, app, monkeypatch):
+    monkeypatch.setattr(Vocabulary, '_seeded', False)
+    with app.app_context():
+        Vocabulary.query.delete()
+        db.session.commit()
+
+    served = set()
+    for _ in range(8):
+        assert client.get('/').status_code == 200
+        with client.session_transaction() as flask_session:
+            served.add(flask_session['word'])
+        client.post('/', data={'answer': 'wrong answer'})
+
+    # Storing the first served word must not leave the quiz stuck on it
+    assert len(served) > 1
+    with app.app_context():
+        assert set(Vocabulary.get_words()) == set(TEST_WORDS)
+
+
+def test_bulk_enrich_charges_the_budget_for_every_call(app, database, fake_llm, monkeypatch):
+    from services import llm_backend
+    from services.enrichment_service import RateBudget, bulk_enrich
+    charged = []
+    monkeypatch.setattr(RateBudget, 'acquire', lambda self, tokens: charged.append(tokens))
+
+    def unparsable_combined_reply(**kwargs):
+        response = fake_llm(**kwargs)
+        if 'Respond with JSON only' in kwargs['messages'][-1]['content']:
+            response['choices'][0]['message']['content'] = 'Sorry, no JSON today.'
+        return response
+
+    llm_backend.set_backend(unparsable_combined_reply)
+    with app.app_context():
+        stats = bulk_enrich(['obdurate', 'pellucid'], concurrency=2)
+
+    assert stats['enriched'] == 2
+    # The combined call plus the two-step fallback's definition and options calls, for each word
+    assert fake_llm.total_calls == len(charged) == 6
+    assert all(tokens > 0 for tokens in charged)
+
+
+def test_fallback_words_are_never_seeded_or_pushed(client, app, fake_sheets, monkeypatch):
+    from services.google_sheet_service import FALLBACK_WORDS, WordListCache
+    fetch = WordListCache._fetch
+
+    def unreachable():
+        raise RuntimeError('Sheets unavailable')
+
+    monkeypatch.setattr(Vocabulary, '_seeded', False)
+    monkeypatch.setattr(WordListCache, '_fetch', unreachable)
+    WordListCache.invalidate()
+    with app.app_context():
+        Vocabulary.query.delete()
+        db.session.commit()
+
+    for _ in range(3):
+        assert client.get('/').status_code == 200
+        with client.session_transaction() as flask_session:
+            assert flask_session['word'] in FALLBACK_WORDS
+    assert not Vocabulary._seeded
+
+    # Only the served words were stored, and a row without a definition is never pushed
+    sheet = fake_sheets.spreadsheets['test-sheet'].worksheets['Vocabulary']
+    with app.app_context():
+        assert 0 < Vocabulary.query.count() <= 3
+        db.session.add(Vocabulary(word='obscure'))
+        db.session.commit()
+        sync_vocabulary()
+    assert all(row[1] for row in sheet.rows[1:])
+    assert 'obscure' not in [row[0] for row in sheet.rows]
+
+    # Once the sheet is reachable again, the real words are seeded
+    monkeypatch.setattr(WordListCache, '_fetch', fetch)
+    WordListCache.invalidate()
+    assert client.get('/').status_code == 200
+    assert Vocabulary._seeded
+    with app.app_context():
+        assert set(TEST_WORDS) <= set(Vocabulary.get_words())
+
+
+def test_bulk_enrich_batch_survives_a_concurrent_insert(app, database, offline_llm, tmp_path):
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from database.models import WordData
+    from services.enrichment_service import bulk_enrich
+    checkpoint = tmp_path / 'checkpoint'
+
+    def request_stores_word_first(session, flush_context, instances):
+        # A quiz request stores one of the words between the batch's existence check and its commit
+        with db.engine.begin() as connection:
+            connection.execute(WordData.__table__.insert().values(
+                word='pellucid', definition='Translucently clear.', incorrect_options='[]'))
+
+    with app.app_context():
+        event.listen(Session, 'before_flush', request_stores_word_first, once=True)
+        stats = bulk_enrich(['obdurate', 'pellucid', 'quotidian'], concurrency=1, checkpoint_path=str(checkpoint))
+
+        assert stats['enriched'] == 3 and stats['failed'] == 0
+        assert WordData.get_correct_answer('pellucid') == 'Translucently clear.'
+        assert WordData.get_correct_answer('quotidian') == 'Definition of quotidian.'
+    assert set(checkpoint.read_text().split()) == {'obdurate', 'pellucid', 'quotidian'}